@@ -0,0 +1,146 @@
+import numpy as np
+import torch
+from torch import nn
+
+from agents.replay_buffer import relabel_rewards
+
+
+class BranchingQNetwork(nn.Module):
+    """Thân MLP chung + Q riêng cho từng sector: Q(s, a) = Σ_i Q_i(s, a_i), a_i ∈ {0 (tắt), 1 (bật)}"""
+
+    def __init__(self, obs_dim, n_actions, hidden=256):
+        super().__init__()
+        self.n_actions = n_actions
+        self.torso = nn.Sequential(
+            nn.Linear(obs_dim, hidden), nn.ReLU(),
+            nn.Linear(hidden, hidden), nn.ReLU(),
+        )
+        self.head = nn.Linear(hidden, n_actions * 2)
+
+    def forward(self, obs):
+        return self.head(self.torso(obs)).view(-1, self.n_actions, 2)
+
+
+class BranchingDQN:
+    """
+    DQN off-policy cho action MultiBinary (Double DQN, Q phân nhánh theo sector).
+    Vì Q là tổng các nhánh, max_a Q(s', a) = Σ_i max Q_i(s', ·) -> không phải duyệt 2^Sectors action.
+    Reward không lưu trong buffer mà được tính lại từ KPI theo reward code của round hiện tại.
+    """
+
+    def __init__(self, obs_dim, n_actions, ocfg, device="auto", hidden=None):
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = torch.device(device)
+        self.ocfg = ocfg
+        self.obs_dim = obs_dim
+        self.n_actions = n_actions
+        self.hidden = hidden or ocfg.get("hidden", 256)
+        self.q = BranchingQNetwork(obs_dim, n_actions, self.hidden).to(self.device)
+        self.q_target = BranchingQNetwork(obs_dim, n_actions, self.hidden).to(self.device)
+        self.q_target.load_state_dict(self.q.state_dict())
+        self.optimizer = torch.optim.Adam(self.q.parameters(), lr=ocfg.get("lr", 1e-3))
+        self.rng = np.random.default_rng()
+
+    def predict(self, obs, deterministic=True, epsilon=0.0):
+        """Giống API của stable_baselines3: trả về (action, None); obs (obs_dim,) hoặc (N, obs_dim)"""
+        single = np.ndim(obs) == 1
+        with torch.no_grad():
+            q = self.q(torch.as_tensor(np.atleast_2d(obs), dtype=torch.float32, device=self.device))
+        action = q.argmax(dim=-1).cpu().numpy().astype(np.int8)
+        if not deterministic and epsilon > 0:
+            explore = self.rng.random(action.shape) < epsilon
+            action = np.where(explore, self.rng.integers(0, 2, action.shape), action).astype(np.int8)
+        return (action[0] if single else action), None
+
+    def _update(self, buffer, reward_code, reward_scale, batch_size, gamma):
+        obs, actions, kpis, next_obs, dones = buffer.sample(batch_size, self.rng)
+        rewards = relabel_rewards(reward_code, kpis) / reward_scale
+
+        to = lambda x, dtype=torch.float32: torch.as_tensor(x, dtype=dtype, device=self.device)
+        obs, next_obs = to(obs), to(next_obs)
+        actions = to(actions, torch.int64)
+        rewards, dones = to(rewards), to(dones.astype(np.float32))
+
+        q = self.q(obs).gather(-1, actions.unsqueeze(-1)).squeeze(-1).sum(dim=1)
+        with torch.no_grad():
+            # Double DQN: chọn action bằng mạng online, đánh giá bằng mạng target
+            best = self.q(next_obs).argmax(dim=-1, keepdim=True)
+            next_q = self.q_target(next_obs).gather(-1, best).squeeze(-1).sum(dim=1)
+            target = rewards + gamma * (1 - dones) * next_q
+
+        loss = nn.functional.smooth_l1_loss(q, target)
+        self.optimizer.zero_grad()
+        loss.backward()
+        nn.utils.clip_grad_norm_(self.q.parameters(), 10.0)
+        self.optimizer.step()
+        return loss.item()
+
+    def learn(self, env, buffer, reward_code, env_steps, gradient_steps):
+        """
+        Thu thêm `env_steps` transition mới (epsilon-greedy) vào buffer và chạy `gradient_steps` bước cập nhật
+        trên toàn bộ buffer (gồm dữ liệu các round trước) với reward tính lại theo `reward_code`.
+        """
+        ocfg = self.ocfg
+        batch_size = ocfg.get("batch_size", 256)
+        gamma = ocfg.get("gamma", 0.99)
+        target_update = ocfg.get("target_update", 500)
+        learning_starts = ocfg.get("learning_starts", 500)
+        eps_start, eps_end = ocfg.get("epsilon", [1.0, 0.05])
+
+        # Buffer đã có dữ liệu từ round trước -> bắt đầu với epsilon thấp hơn
+        if buffer.size >= learning_starts:
+            eps_start = min(eps_start, 0.3)
+
+        # Chia cập nhật xen kẽ với thu thập dữ liệu; phần còn lại chạy sau khi thu thập xong
+        updates_per_step = gradient_steps / max(env_steps, 1)
+        reward_scale = None
+        done_updates = 0
+        obs, _ = env.reset()
+        for step in range(env_steps):
+            epsilon = eps_start + (eps_end - eps_start) * step / max(env_steps - 1, 1)
+            action, _ = self.predict(obs, deterministic=False, epsilon=epsilon)
+            next_obs, _, terminated, truncated, info = env.step(action)
+            # Lưu action đã thực thi (env có thể chiếu action về tập hợp lệ) để khớp với KPI của bước
+            buffer.add(obs, info.get("action", action), info, info.get("users_active", 0.0), next_obs, terminated)
+            obs = next_obs
+            if terminated or truncated:
+                obs, _ = env.reset()
+
+            if buffer.size < learning_starts:
+                continue
+            if reward_scale is None:
+                reward_scale = self._reward_scale(buffer, reward_code)
+            while done_updates < (step + 1) * updates_per_step:
+                self._gradient_step(buffer, reward_code, reward_scale, batch_size, gamma, target_update, done_updates)
+                done_updates += 1
+
+        if buffer.size >= learning_starts:
+            reward_scale = reward_scale or self._reward_scale(buffer, reward_code)
+            while done_updates < gradient_steps:
+                self._gradient_step(buffer, reward_code, reward_scale, batch_size, gamma, target_update, done_updates)
+                done_updates += 1
+        buffer.flush()
+        return self
+
+    def _gradient_step(self, buffer, reward_code, reward_scale, batch_size, gamma, target_update, n):
+        self._update(buffer, reward_code, reward_scale, batch_size, gamma)
+        if (n + 1) % target_update == 0:
+            self.q_target.load_state_dict(self.q.state_dict())
+
+    def _reward_scale(self, buffer, reward_code, n=10000):
+        """Độ lớn reward rất khác nhau giữa các code (ví dụ hệ số 50000) -> chuẩn hóa theo std trên buffer"""
+        _, _, kpis, _, _ = buffer.sample(min(n, buffer.size), self.rng)
+        return max(float(np.std(relabel_rewards(reward_code, kpis))), 1e-6)
+
+    def save(self, path):
+        torch.save({"obs_dim": self.obs_dim, "n_actions": self.n_actions, "hidden": self.hidden,
+                    "state_dict": self.q.state_dict()}, path)
+
+    @classmethod
+    def load(cls, path, ocfg, device="auto"):
+        data = torch.load(path, map_location="cpu")
+        model = cls(data["obs_dim"], data["n_actions"], ocfg, device, hidden=data["hidden"])
+        model.q.load_state_dict(data["state_dict"])
+        model.q_target.load_state_dict(data["state_dict"])
+        return model
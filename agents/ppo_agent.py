@@ -1,14 +1,67 @@
-from stable_baselines3 import PPO
+import os
 from omegaconf import DictConfig
-import torch # (Tùy chọn) Để check GPU nếu cần
+
+# stable_baselines3 (kéo theo torch) được import tại chỗ trong train/load:
+# các lệnh không train (create, plot, worker...) không phải trả vài giây khởi động
+
+def load_policy(path, cfg, device="cpu"):
+    """
+    Load policy đã lưu cho inference (serving / online controller, không cần env) -> (policy, masked).
+    masking.enabled: checkpoint là MaskablePPO (sb3_contrib), predict cần action_masks.
+    rl.algorithm=bdqn: checkpoint torch của BranchingDQN (mask chỉ áp dụng bằng cách chiếu action).
+    """
+    if cfg.rl.get("algorithm", "ppo") == "bdqn":
+        from agents.branching_dqn import BranchingDQN
+        return BranchingDQN.load(path, cfg.offpolicy, device), False
+
+    if cfg.get("masking", {}).get("enabled", False):
+        try:
+            from sb3_contrib import MaskablePPO
+            return MaskablePPO.load(path, device=device), True
+        except ImportError:
+            print("⚠️ Chưa cài sb3-contrib: load bằng PPO thường")
+    from stable_baselines3 import PPO
+    return PPO.load(path, device=device), False
+
 
 class DRLAgent:
     def __init__(self, env, cfg: DictConfig):
         self.env = env
         self.cfg = cfg
         self.model = None
+        # True khi model là MaskablePPO (predict cần action_masks)
+        self.masked = False
+
+    def _ppo_class(self):
+        """
+        masking.enabled: dùng MaskablePPO (sb3_contrib) để policy chỉ lấy mẫu action hợp lệ theo env.action_masks().
+        Thiếu sb3_contrib thì quay về PPO thường (env vẫn chiếu action về tập hợp lệ khi step).
+        """
+        if self.cfg.get("masking", {}).get("enabled", False):
+            try:
+                from sb3_contrib import MaskablePPO
+                self.masked = True
+                return MaskablePPO
+            except ImportError:
+                print("⚠️ Chưa cài sb3-contrib: train PPO thường, mask chỉ áp dụng trong env.step")
+        from stable_baselines3 import PPO
+        self.masked = False
+        return PPO
+
+    def _predict(self, obs, env, deterministic=False):
+        # MaskablePPO cần mask của bước hiện tại khi predict
+        if self.masked:
+            return self.model.predict(obs, deterministic=deterministic, action_masks=env.action_masks())
+        return self.model.predict(obs, deterministic=deterministic)
 
     def train(self):
+        if self.cfg.rl.get("algorithm", "ppo") == "bdqn":
+            return self.train_off_policy()
+        if self.cfg.get("multires", {}).get("enabled", False):
+            return self.train_multi_resolution()
+
+        PPO = self._ppo_class()
+
         # [SỬA ĐỔI] Đổi 'cpu' thành 'cuda' (để ép dùng GPU) hoặc 'auto' (tự động chọn GPU nếu có)
         self.model = PPO(
             "MlpPolicy", 
@@ -20,30 +73,227 @@ class DRLAgent:
         self.model.learn(total_timesteps=self.cfg.rl.train_timesteps)
         return self.model
 
-    def evaluate(self, episodes=5):
-        total_power = 0
-        total_drop = 0
-        total_switch = 0
-        
-        steps_per_ep = self.cfg.rl.max_episode_steps
-        
+    def _coarse_env(self, factor):
+        """Env cùng topology / reward code trên dataset gộp `factor` bước (cùng layout observation)"""
+        from envs.telecom_env import TelecomEnv
+        from utils.resample import resample_data_pack
+
+        data_pack = {
+            "topology": self.env.graph,
+            "traffic": self.env.traffic_matrix * self.env.time_scale,  # Env lưu traffic / interval gốc
+            "users": self.env.user_matrix,
+            "interval_minutes": self.env.interval_minutes,
+        }
+        env = TelecomEnv(self.cfg, resample_data_pack(data_pack, factor))
+        env.reward_function_code = self.env.reward_function_code
+        return env
+
+    def train_multi_resolution(self):
+        """
+        Pretrain trên dataset thô (multires.factor bước gộp thành 1, mặc định 15 phút -> 1 giờ)
+        rồi fine-tune cùng model trên dataset gốc. PPO thu dữ liệu theo rollout n_steps bước nên mỗi phase
+        được làm tròn xuống bội của n_steps -> tổng số bước env không vượt rl.train_timesteps
+        (trừ khi ngân sách < 2 rollout tối thiểu 64 bước).
+        """
+        PPO = self._ppo_class()
+        mcfg = self.cfg.multires
+        total = self.cfg.rl.train_timesteps
+        coarse_target = int(total * mcfg.get("coarse_fraction", 0.5))
+
+        # n_steps (mặc định PPO 2048) thu nhỏ cho vừa phase ngắn hơn, giữ bội của batch_size 64
+        n_steps = min(2048, coarse_target, total - coarse_target) // 64 * 64
+        n_steps = max(n_steps, 64)
+        coarse_steps = max(coarse_target // n_steps, 1) * n_steps
+        fine_steps = max((total - coarse_steps) // n_steps, 1) * n_steps
+
+        coarse_env = self._coarse_env(mcfg.get("factor", 4))
+        self.model = PPO("MlpPolicy", coarse_env, n_steps=n_steps, verbose=0, device='auto')
+        print(f"   Pretrain thô: {coarse_steps} bước ({coarse_env.interval_minutes} phút/bước)")
+        self.model.learn(total_timesteps=coarse_steps)
+
+        # Observation cùng shape -> chuyển thẳng sang env gốc, giữ optimizer và bộ đếm bước
+        self.model.set_env(self.env)
+        print(f"   Fine-tune: {fine_steps} bước ({self.env.interval_minutes} phút/bước)")
+        self.model.learn(total_timesteps=fine_steps, reset_num_timesteps=False)
+        return self.model
+
+    # --- Off-policy: Branching DQN + replay buffer KPI dùng lại qua các round ---
+
+    def _replay_buffer(self):
+        from agents.replay_buffer import KPIReplayBuffer
+
+        if getattr(self, "replay", None) is None:
+            from utils.naming import dynamics_digest, get_dataset_name
+
+            ocfg = self.cfg.offpolicy
+            obs_dim = self.env.observation_space.shape[0]
+            n_actions = self.env.action_space.n
+            # Thư mục riêng theo dataset + layout observation + cấu hình energy/network (KPI power phụ thuộc
+            # các tham số này) -> chỉ dùng lại transition sinh ra từ cùng dynamics ở lần chạy sau
+            name = f"{get_dataset_name(self.cfg)}_obs{obs_dim}_act{n_actions}_{dynamics_digest(self.cfg)}"
+            self.replay = KPIReplayBuffer(os.path.join(ocfg.buffer_dir, name), obs_dim, n_actions, ocfg.buffer_size)
+        return self.replay
+
+    def train_off_policy(self):
+        """
+        Mỗi round chỉ thu thêm offpolicy.env_steps_per_round bước môi trường; phần học dùng toàn bộ
+        replay buffer (kể cả dữ liệu các round/lần chạy trước) với reward tính lại theo code hiện tại.
+        """
+        from agents.branching_dqn import BranchingDQN
+
+        ocfg = self.cfg.offpolicy
+        buffer = self._replay_buffer()
+        obs_dim = self.env.observation_space.shape[0]
+        warm = ocfg.get("warm_start", True) and isinstance(self.model, BranchingDQN)
+        if not warm:
+            self.model = BranchingDQN(obs_dim, self.env.action_space.n, ocfg)
+        self.masked = False
+        print(f"   Replay buffer: {buffer.size} transition có sẵn")
+        self.model.learn(self.env, buffer, self.env.reward_function_code,
+                         ocfg.env_steps_per_round, ocfg.gradient_steps)
+        return self.model
+
+    def save(self, path):
+        # Lưu policy (.zip) để dùng lại cho inference service (serving/policy_server.py)
+        self.model.save(path)
+
+    def load(self, path, device="auto"):
+        if self.cfg.rl.get("algorithm", "ppo") == "bdqn":
+            from agents.branching_dqn import BranchingDQN
+
+            self.masked = False
+            self.model = BranchingDQN.load(path, self.cfg.offpolicy, device)
+            return self.model
+
+        PPO = self._ppo_class()
+
+        self.model = PPO.load(path, env=self.env, device=device)
+        return self.model
+
+    # --- Multi-objective: 1 policy điều kiện theo trọng số (w_drop, w_switch) ---
+
+    def _mo_env(self):
+        from envs.weighted_env import WeightConditionedEnv
+
+        if getattr(self, "mo_env", None) is None:
+            mo = self.cfg.multi_objective
+            self.mo_env = WeightConditionedEnv(self.env, mo.w_drop_range, mo.w_switch_range)
+        return self.mo_env
+
+    def train_multi_objective(self):
+        """Train 1 lần trên WeightConditionedEnv (trọng số lấy mẫu mỗi episode) thay vì 1 lần / reward"""
+        from stable_baselines3 import PPO
+
+        self.masked = False
+        self.model = PPO("MlpPolicy", self._mo_env(), verbose=0, device='cuda')
+        timesteps = self.cfg.multi_objective.get("train_timesteps", None) or self.cfg.rl.train_timesteps
+        self.model.learn(total_timesteps=timesteps)
+        return self.model
+
+    def load_multi_objective(self, path, device="auto"):
+        from stable_baselines3 import PPO
+
+        self.masked = False
+        self.model = PPO.load(path, env=self._mo_env(), device=device)
+        return self.model
+
+    def _eval_window(self):
+        # Đánh giá luôn trên toàn bộ trace (kể cả khi train với rl.random_start) -> KPI so sánh được giữa các round
+        return {"start": 0, "length": self.env.unwrapped.max_data_steps}
+
+    def evaluate_weights(self, w_drop, w_switch, episodes=1):
+        """KPI trung bình / bước của policy điều kiện khi cố định trọng số (w_drop, w_switch)"""
+        env = self._mo_env()
+        total_power = total_drop = total_switch = 0.0
+        total_steps = 0
         for _ in range(episodes):
-            obs, _ = self.env.reset()
+            obs, _ = env.reset(options={"weights": (w_drop, w_switch), **self._eval_window()})
             done = False
             while not done:
-                # model.predict cũng sẽ chạy trên GPU
-                action, _ = self.model.predict(obs)
-                
-                # env.step chạy trên CPU (vì Gymnasium viết bằng NumPy)
-                obs, _, done, _, info = self.env.step(action)
-                
+                action, _ = self._predict(obs, env, deterministic=True)
+                obs, _, terminated, truncated, info = env.step(action)
+                done = terminated or truncated
                 total_power += info['power']
                 total_drop += info['drop_rate']
                 total_switch += info['switches']
+                total_steps += 1
+        return {
+            "avg_power": total_power / total_steps,
+            "avg_drop_rate": total_drop / total_steps,
+            "avg_switches": total_switch / total_steps
+        }
+
+    def pareto_front(self, weights, episodes=1):
+        """
+        Quét danh sách (w_drop, w_switch) bằng inference trên cùng 1 model.
+        Mỗi điểm có cờ 'pareto' = không bị điểm nào khác trội hơn về (avg_power, avg_drop_rate).
+        """
+        points = []
+        for w_drop, w_switch in weights:
+            metrics = self.evaluate_weights(w_drop, w_switch, episodes)
+            points.append({"w_drop": float(w_drop), "w_switch": float(w_switch), **metrics})
+
+        for p in points:
+            p["pareto"] = not any(
+                q["avg_power"] <= p["avg_power"] and q["avg_drop_rate"] <= p["avg_drop_rate"]
+                and (q["avg_power"] < p["avg_power"] or q["avg_drop_rate"] < p["avg_drop_rate"])
+                for q in points
+            )
+        return sorted(points, key=lambda p: p["avg_power"])
+
+    def evaluate(self, episodes=5):
+        from utils.accumulators import KPIAccumulator
+
+        total_power = 0
+        total_drop = 0
+        total_switch = 0
+        total_steps = 0
+
+        # Thống kê chi tiết theo sector / giờ trong ngày (bộ nhớ cố định), xem self.kpi_stats
+        self.kpi_stats = KPIAccumulator(self.env.total_sectors, self.cfg)
+        self.env.track_sectors = True
         
-        total_steps = episodes * steps_per_ep
+        try:
+            for _ in range(episodes):
+                obs, _ = self.env.reset(options=self._eval_window())
+                done = False
+                while not done:
+                    # model.predict cũng sẽ chạy trên GPU
+                    action, _ = self._predict(obs, self.env)
+                    
+                    # env.step chạy trên CPU (vì Gymnasium viết bằng NumPy)
+                    obs, _, terminated, truncated, info = self.env.step(action)
+                    done = terminated or truncated
+                    
+                    total_power += info['power']
+                    total_drop += info['drop_rate']
+                    total_switch += info['switches']
+                    total_steps += 1
+                    self.kpi_stats.update(info)
+        finally:
+            self.env.track_sectors = False
+        
+        # Chia theo số bước thực tế (episode có thể dài hơn rl.max_episode_steps)
         return {
             "avg_power": total_power / total_steps,
             "avg_drop_rate": total_drop / total_steps,
             "avg_switches": total_switch / total_steps
-        }
\ No newline at end of file
+        }
+
+    def stress_test(self, scenarios=None):
+        """
+        Đánh giá độ bền trên cfg.stress.scenarios biến thể nhiễu của dataset (envs/stress_test.py),
+        chạy batch: 1 lần predict cho mọi scenario mỗi bước.
+        """
+        from envs.stress_test import run_stress_test
+
+        scfg = self.cfg.stress.copy()
+        if scenarios:
+            scfg.scenarios = scenarios
+
+        def policy(obs, batch_env):
+            if self.masked:
+                return self.model.predict(obs, deterministic=True, action_masks=batch_env.action_masks())[0]
+            return self.model.predict(obs, deterministic=True)[0]
+
+        return run_stress_test(self.env, policy, scfg, interval_minutes=self.env.interval_minutes)
@@ -0,0 +1,102 @@
+import json
+import os
+
+import numpy as np
+
+# Thành phần KPI lưu trong buffer (thay cho reward) -> reward được tính lại theo code của round hiện tại
+KPI_FIELDS = ("power", "drop_rate", "switches", "users_active")
+
+
+def relabel_rewards(code, kpis):
+    """
+    Tính reward cho cả batch KPI (N, 4) theo reward code.
+    Thử chạy code 1 lần với mảng NumPy (code tuyến tính kiểu "reward = -power - 50000 * drop_rate");
+    nếu không vectorized được thì chạy từng dòng như TelecomEnv.step (kể cả reward fallback).
+    """
+    def fallback(power, drop_rate):
+        return -power - 1000 * drop_rate
+
+    columns = {name: kpis[:, i] for i, name in enumerate(KPI_FIELDS)}
+    if not code:
+        return fallback(columns["power"], columns["drop_rate"])
+
+    compiled = compile(code, "<reward>", "exec")
+    try:
+        loc = dict(columns, reward=0.0)
+        exec(compiled, {}, loc)
+        reward = np.broadcast_to(np.asarray(loc["reward"], dtype=float), len(kpis))
+        return np.array(reward)
+    except Exception:
+        pass
+
+    rewards = np.empty(len(kpis))
+    for n, row in enumerate(kpis):
+        loc = dict(zip(KPI_FIELDS, row), reward=0.0)
+        try:
+            exec(compiled, {}, loc)
+            rewards[n] = loc["reward"]
+        except Exception:
+            rewards[n] = fallback(row[0], row[1])
+    return rewards
+
+
+class KPIReplayBuffer:
+    """
+    Replay buffer vòng (ring) lưu trên đĩa bằng np.memmap: obs, action, KPI thô, next_obs, done.
+    Không lưu reward -> dữ liệu của các round trước vẫn dùng được khi reward code thay đổi,
+    và còn nguyên giữa các lần chạy (mở lại cùng thư mục).
+    """
+
+    def __init__(self, path, obs_dim, n_actions, capacity=200000):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "meta.json")
+
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if (meta["obs_dim"], meta["n_actions"]) != (obs_dim, n_actions):
+                raise ValueError(f"Replay buffer tại {path} có layout khác (obs_dim/n_actions)")
+            capacity = meta["capacity"]
+            self.size, self.pos = meta["size"], meta["pos"]
+            mode = "r+"
+        else:
+            self.size, self.pos = 0, 0
+            mode = "w+"
+
+        self.capacity = capacity
+        self.obs_dim = obs_dim
+        self.n_actions = n_actions
+        open_ = lambda name, dtype, shape: np.lib.format.open_memmap(
+            os.path.join(path, f"{name}.npy"), mode=mode, dtype=dtype, shape=shape
+        )
+        self.obs = open_("obs", np.float32, (capacity, obs_dim))
+        self.next_obs = open_("next_obs", np.float32, (capacity, obs_dim))
+        self.actions = open_("actions", np.uint8, (capacity, n_actions))
+        self.kpis = open_("kpis", np.float64, (capacity, len(KPI_FIELDS)))
+        self.dones = open_("dones", np.bool_, (capacity,))
+        self._save_meta()
+
+    def _save_meta(self):
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump({"obs_dim": self.obs_dim, "n_actions": self.n_actions, "capacity": self.capacity,
+                       "size": self.size, "pos": self.pos}, f)
+
+    def add(self, obs, action, info, users_active, next_obs, done):
+        i = self.pos
+        self.obs[i] = obs
+        self.actions[i] = action
+        self.kpis[i] = (info["power"], info["drop_rate"], info["switches"], users_active)
+        self.next_obs[i] = next_obs
+        self.dones[i] = done
+        self.pos = (self.pos + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size, rng):
+        idx = np.sort(rng.integers(self.size, size=batch_size))  # Đọc memmap theo thứ tự tăng dần
+        return self.obs[idx], self.actions[idx], self.kpis[idx], self.next_obs[idx], self.dones[idx]
+
+    def flush(self):
+        for arr in (self.obs, self.next_obs, self.actions, self.kpis, self.dones):
+            arr.flush()
+        self._save_meta()
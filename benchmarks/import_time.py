@@ -0,0 +1,67 @@
+# benchmarks/import_time.py
+"""
+Đo thời gian import của các entry point bằng `python -X importtime`.
+Chạy: python benchmarks/import_time.py [--repeat 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = [
+    "cli",
+    "main",
+    "utils.create",
+    "utils.read",
+    "utils.shared_data",
+    "agents.ppo_agent",
+    "envs.telecom_env",
+    "serving.policy_server",
+    "serving.online_controller",
+]
+
+# Module nặng: chỉ nên bị import trên nhánh thật sự cần
+HEAVY_MODULES = ["torch", "stable_baselines3", "gymnasium", "matplotlib", "hydra", "pandas", "scipy"]
+
+
+def measure(module):
+    """Trả về (tổng thời gian import [ms], danh sách module nặng bị kéo theo)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import {module} lỗi:\n{result.stderr[-2000:]}")
+
+    total_us = 0
+    heavy = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        # Dòng không thụt lề = module import trực tiếp ở top level -> cộng cumulative
+        if not line.split("|")[2].startswith("  "):
+            total_us += int(cumulative)
+        root = name.split(".")[0]
+        if root in HEAVY_MODULES:
+            heavy.add(root)
+    return total_us / 1000, sorted(heavy)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark thời gian import (-X importtime)")
+    parser.add_argument("--repeat", type=int, default=3, help="Lấy giá trị nhỏ nhất sau N lần đo")
+    args = parser.parse_args(argv)
+
+    print(f"{'entry point':<28}{'import (ms)':>12}  heavy modules")
+    for module in ENTRY_POINTS:
+        runs = [measure(module) for _ in range(args.repeat)]
+        best_ms = min(ms for ms, _ in runs)
+        heavy = runs[0][1]
+        print(f"{module:<28}{best_ms:>12.1f}  {', '.join(heavy) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
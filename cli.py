@@ -0,0 +1,242 @@
+# cli.py
+"""
+CLI chung cho project:
+    python cli.py create   [key=value ...]
+    python cli.py train    [key=value ...]
+    python cli.py evaluate [--model PATH] [--episodes N] [--diagnostics kpi.csv] [key=value ...]
+    python cli.py serve    --model PATH [--port 8080] [key=value ...]
+    python cli.py online   --model PATH --input kpi.csv [key=value ...]
+    python cli.py plot     [key=value ...]
+    python cli.py pareto   [--model PATH] [--w-switch 0 20] [key=value ...]
+    python cli.py stress   [--model PATH] [--scenarios 500] [key=value ...]
+    python cli.py share    [--datasets NAME ...] [key=value ...]
+
+key=value ghi đè conf/config.yaml (giống override của Hydra), ví dụ: dataset_name=data_C5_S24_U50 rl.train_timesteps=20000
+Mỗi subcommand chỉ import module mà nó cần -> create/plot/worker khởi động nhanh.
+"""
+import argparse
+import json
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, "conf", "config.yaml")
+
+
+def load_config(overrides):
+    from omegaconf import OmegaConf
+
+    cfg = OmegaConf.load(CONFIG_PATH)
+    if overrides:
+        cfg = OmegaConf.merge(cfg, OmegaConf.from_dotlist(overrides))
+    return cfg
+
+
+def default_model_path(cfg):
+    from utils.naming import model_filename
+
+    return os.path.join(PROJECT_ROOT, "models", model_filename(cfg))
+
+
+def cmd_create(args, cfg):
+    from utils.create import create_dataset
+
+    create_dataset(cfg)
+
+
+def cmd_train(args, cfg):
+    from main import run
+
+    run(cfg, PROJECT_ROOT)
+
+
+def cmd_evaluate(args, cfg):
+    from utils.naming import get_dataset_name
+    from envs.telecom_env import TelecomEnv
+    from utils.read import load_dataset
+    from agents.ppo_agent import DRLAgent
+
+    env = TelecomEnv(cfg, load_dataset(get_dataset_name(cfg), shared=cfg.get("shared_dataset", False)))
+    agent = DRLAgent(env, cfg)
+    agent.load(args.model or default_model_path(cfg))
+    metrics = agent.evaluate(episodes=args.episodes)
+    print(f"Result: Power={metrics['avg_power']:.1f}, Drop={metrics['avg_drop_rate']*100:.2f}%, "
+          f"Switches={metrics['avg_switches']:.2f}")
+    if args.diagnostics:
+        agent.kpi_stats.export(args.diagnostics)
+
+
+def cmd_serve(args, cfg):
+    from utils.naming import get_dataset_name
+    from serving.policy_server import load_service, serve
+
+    service = load_service(args.model or default_model_path(cfg), get_dataset_name(cfg), cfg,
+                           args.max_batch, args.max_wait_ms)
+    serve(service, args.host, args.port)
+
+
+def cmd_online(args, cfg):
+    from agents.ppo_agent import load_policy
+    from serving.online_controller import run_online
+
+    policy, masked = load_policy(args.model or default_model_path(cfg), cfg, device="cpu")
+    run_online(policy, cfg, args.input, args.output, follow=not args.no_follow, masked=masked)
+
+
+def cmd_plot(args, cfg):
+    from utils.naming import get_dataset_name
+    from utils.plot import plot_history
+
+    dataset_name = get_dataset_name(cfg)
+    fig_dir = os.path.join(PROJECT_ROOT, "figures")
+    with open(os.path.join(fig_dir, f"history_{dataset_name}.json")) as f:
+        history = json.load(f)
+    fig_path = os.path.join(fig_dir, f"result_{dataset_name}.png")
+    plot_history(history["power"], history["drop_rate"], fig_path)
+    print(f"📊 Đã lưu biểu đồ kết quả tại: {fig_path}")
+
+
+def cmd_pareto(args, cfg):
+    import csv
+    import numpy as np
+    from utils.naming import get_dataset_name
+    from envs.telecom_env import TelecomEnv
+    from utils.read import load_dataset
+    from agents.ppo_agent import DRLAgent
+
+    dataset_name = get_dataset_name(cfg)
+    env = TelecomEnv(cfg, load_dataset(dataset_name, shared=cfg.get("shared_dataset", False)))
+    agent = DRLAgent(env, cfg)
+    mo = cfg.multi_objective
+
+    if args.model:
+        agent.load_multi_objective(args.model)
+    else:
+        # 1 lần train cho cả dải trọng số
+        agent.train_multi_objective()
+        model_dir = os.path.join(PROJECT_ROOT, "models")
+        os.makedirs(model_dir, exist_ok=True)
+        agent.save(os.path.join(model_dir, f"ppo_mo_{dataset_name}.zip"))
+
+    w_switches = args.w_switch if args.w_switch else [float(np.mean(mo.w_switch_range))]
+    weights = [(w_drop, w_switch)
+               for w_drop in np.geomspace(*mo.w_drop_range, mo.query_points)
+               for w_switch in w_switches]
+    front = agent.pareto_front(weights, episodes=args.episodes)
+
+    fig_dir = os.path.join(PROJECT_ROOT, "figures")
+    os.makedirs(fig_dir, exist_ok=True)
+    csv_path = os.path.join(fig_dir, f"pareto_{dataset_name}.csv")
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(front[0]))
+        writer.writeheader()
+        writer.writerows(front)
+
+    for p in front:
+        mark = "*" if p["pareto"] else " "
+        print(f"{mark} w_drop={p['w_drop']:>10.1f} w_switch={p['w_switch']:>5.1f} | "
+              f"Power={p['avg_power']:.1f}, Drop={p['avg_drop_rate']*100:.2f}%")
+    print(f"📈 Đã lưu Pareto front tại: {csv_path}")
+
+
+def cmd_stress(args, cfg):
+    from utils.naming import get_dataset_name
+    from envs.telecom_env import TelecomEnv
+    from utils.read import load_dataset
+    from agents.ppo_agent import DRLAgent
+
+    env = TelecomEnv(cfg, load_dataset(get_dataset_name(cfg), shared=cfg.get("shared_dataset", False)))
+    agent = DRLAgent(env, cfg)
+    agent.load(args.model or default_model_path(cfg))
+    report = agent.stress_test(scenarios=args.scenarios)
+    print(f"Stress test ({report['scenarios']} scenarios): Power={report['avg_power']:.1f}, "
+          f"Drop={report['avg_drop_rate']*100:.2f}%, p95={report['p95_drop_rate']*100:.2f}%, "
+          f"p99={report['p99_drop_rate']*100:.2f}%, vượt ngưỡng={report['violation_rate']*100:.1f}%")
+    print(f"Giờ tệ nhất: {report['worst_hour']:02d}h (Drop={report['worst_hour_drop_rate']*100:.2f}%)")
+
+
+def cmd_share(args, cfg):
+    import time
+    from utils.naming import get_dataset_name
+    from utils.shared_data import DatasetBroker
+
+    # Giữ dataset trong shared memory cho tới khi dừng; worker / multirun chạy với shared_dataset=true
+    names = args.datasets or [get_dataset_name(cfg)]
+    with DatasetBroker() as broker:
+        for name in names:
+            broker.publish(name)
+        print("⏳ Đang giữ shared memory (Ctrl+C để giải phóng). Chạy các job với shared_dataset=true")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="LLM reward design + DRL tiết kiệm năng lượng trạm")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("create", help="Sinh dataset KPI (utils/create.py)")
+    sub.add_parser("train", help="Chạy vòng lặp LLM reward + PPO (main.py)")
+
+    p = sub.add_parser("evaluate", help="Đánh giá policy đã lưu")
+    p.add_argument("--model", default=None, help="Mặc định: models/ppo_<dataset>.zip (bdqn_<dataset>.pt với rl.algorithm=bdqn)")
+    p.add_argument("--episodes", type=int, default=5)
+    p.add_argument("--diagnostics", default=None, help="Export KPI theo sector/giờ ra .csv hoặc .parquet")
+
+    p = sub.add_parser("serve", help="HTTP inference service (serving/policy_server.py)")
+    p.add_argument("--model", default=None, help="Mặc định: models/ppo_<dataset>.zip (bdqn_<dataset>.pt với rl.algorithm=bdqn)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--max-batch", type=int, default=64)
+    p.add_argument("--max-wait-ms", type=float, default=2.0)
+
+    p = sub.add_parser("online", help="Online controller tail KPI feed (serving/online_controller.py)")
+    p.add_argument("--model", default=None, help="Mặc định: models/ppo_<dataset>.zip (bdqn_<dataset>.pt với rl.algorithm=bdqn)")
+    p.add_argument("--input", required=True, help="KPI CSV hoặc '-' cho stdin")
+    p.add_argument("--output", default="decisions.csv")
+    p.add_argument("--no-follow", action="store_true")
+
+    sub.add_parser("plot", help="Vẽ lại biểu đồ từ figures/history_<dataset>.json")
+
+    p = sub.add_parser("pareto", help="Train policy điều kiện theo trọng số và quét Pareto front power/drop")
+    p.add_argument("--model", default=None, help="Policy multi-objective đã lưu (bỏ qua bước train)")
+    p.add_argument("--w-switch", type=float, nargs="+", default=None,
+                   help="Các giá trị w_switch khi quét (mặc định: giữa multi_objective.w_switch_range)")
+    p.add_argument("--episodes", type=int, default=1)
+
+    p = sub.add_parser("stress", help="Stress test Monte-Carlo: p95/p99 drop rate trên các biến thể nhiễu")
+    p.add_argument("--model", default=None, help="Mặc định: models/ppo_<dataset>.zip (bdqn_<dataset>.pt với rl.algorithm=bdqn)")
+    p.add_argument("--scenarios", type=int, default=None, help="Mặc định: stress.scenarios")
+
+    p = sub.add_parser("share", help="Publish dataset vào shared memory cho các worker (utils/shared_data.py)")
+    p.add_argument("--datasets", nargs="+", default=None, help="Mặc định: dataset theo config hiện tại")
+    return parser
+
+
+COMMANDS = {
+    "create": cmd_create,
+    "train": cmd_train,
+    "evaluate": cmd_evaluate,
+    "serve": cmd_serve,
+    "online": cmd_online,
+    "plot": cmd_plot,
+    "pareto": cmd_pareto,
+    "stress": cmd_stress,
+    "share": cmd_share,
+}
+
+
+def main(argv=None):
+    args, overrides = build_parser().parse_known_args(argv)
+    bad = [o for o in overrides if "=" not in o]
+    if bad:
+        raise SystemExit(f"Tham số không hợp lệ: {bad} (override dạng key=value)")
+    cfg = load_config(overrides)
+    COMMANDS[args.command](args, cfg)
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, PROJECT_ROOT)
+    main()
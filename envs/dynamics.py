@@ -0,0 +1,100 @@
+# Công thức observation / KPI chỉ dùng NumPy (không cần gymnasium) -> import nhanh cho serving
+import numpy as np
+
+def build_obs(users, traffic, status, features=None):
+    """
+    Observation (Sectors * 4,) từ KPI 1 bước. Dùng chung cho env và inference service.
+    features (Sectors, K): feature xu hướng (envs/features.py) ghép thêm vào mỗi sector -> (Sectors * (4 + K),)
+    """
+    obs = np.stack([
+        users,
+        # Tránh chia cho 0
+        traffic / (users + 1e-9),
+        traffic,
+        status
+    ], axis=-1)
+    if features is not None:
+        obs = np.concatenate([obs, features], axis=-1)
+    return obs.reshape(*obs.shape[:-2], -1).astype(np.float32)
+
+def step_kpis(traffic, action, last_actions, cfg, n_cells, n_sectors):
+    """
+    KPI của 1 bước: (power, drop_rate, switches).
+    Dùng chung cho TelecomEnv.step và các controller online (cùng công thức, không cần env).
+    Hỗ trợ batch theo trục đầu: traffic/action (N, Sectors) -> mỗi KPI có shape (N,).
+    """
+    # Capacity thực tế = Capacity Sector * Trạng thái Bật/Tắt
+    available_capacity = action * cfg.network.capacity_sector
+    
+    # Traffic được phục vụ = Min(Nhu cầu, Khả năng đáp ứng)
+    served_traffic = np.minimum(traffic, available_capacity)
+    
+    # Drop Rate = Phần không được phục vụ / Tổng nhu cầu (0 khi không có nhu cầu)
+    total_demand_step = np.sum(traffic, axis=-1)
+    total_served = np.sum(served_traffic, axis=-1)
+    drop_rate = np.divide(total_demand_step - total_served, total_demand_step,
+                          out=np.zeros(np.shape(total_demand_step)), where=total_demand_step > 0)[()]
+    
+    # Công suất nền cho các Cell có ít nhất 1 sector bật
+    cells = np.reshape(action, (*np.shape(action)[:-1], n_cells, n_sectors))
+    active_cells = np.sum(np.any(cells > 0, axis=-1), axis=-1)
+    active_sectors = np.sum(action, axis=-1)
+    
+    # P_Total = (Số Cell bật * P_Base) + (Số Sector bật * P_Sector)
+    total_power = (active_cells * cfg.energy.p_base) + (active_sectors * cfg.energy.p_sector_active)
+    
+    # Cộng phạt chuyển đổi trạng thái
+    switches = np.sum(np.abs(action - last_actions), axis=-1)
+    total_power += switches * cfg.energy.p_switch
+    return total_power, drop_rate, switches
+
+def sector_kpis(traffic, action, last_actions, cfg, n_cells, n_sectors):
+    """
+    KPI tách theo từng sector (Sectors,) cho chẩn đoán: power, drop_rate, switches, served.
+    Công suất nền của cell được chia đều cho các sector đang bật trong cell -> tổng = power của step_kpis.
+    """
+    action = np.asarray(action, dtype=float)
+    served = np.minimum(traffic, action * cfg.network.capacity_sector)
+    drop = np.divide(traffic - served, traffic, out=np.zeros(len(served)), where=traffic > 0)
+
+    active_per_cell = np.reshape(action, (n_cells, n_sectors)).sum(axis=1)
+    base_share = np.divide(cfg.energy.p_base, active_per_cell, out=np.zeros(n_cells), where=active_per_cell > 0)
+    switches = np.abs(action - last_actions)
+    power = action * (np.repeat(base_share, n_sectors) + cfg.energy.p_sector_active) + switches * cfg.energy.p_switch
+    return {"power": power, "drop_rate": drop, "switches": switches, "served": served}
+
+def sleep_masks(traffic, status, steps_since_switch, drop_budget, min_dwell):
+    """
+    Mask an toàn cho từng sector (vectorized, hỗ trợ batch theo trục đầu):
+      - can_off: được phép tắt. Ngân sách drop tính cộng dồn: tắt sector = mất toàn bộ traffic của nó
+        (env không mô phỏng offload), nên chỉ các sector traffic nhỏ nhất mà tổng traffic của chúng
+        (cộng traffic của sector đang tắt bị khóa) không vượt drop_budget * tổng traffic mới được tắt.
+        Sector vừa mới bật (< min_dwell bước) không được tắt.
+      - can_on: được phép bật -> sector không vừa mới tắt, trừ khi traffic buộc phải bật
+    Tắt mọi sector trong can_off cùng lúc vẫn giữ drop_rate <= drop_budget.
+    Sector "must stay on" = ~can_off; "may sleep" = can_off.
+    """
+    traffic = np.asarray(traffic, dtype=float)
+    total = np.sum(traffic, axis=-1, keepdims=True)
+    locked = steps_since_switch < min_dwell
+    locked_on = locked & (status > 0)
+    locked_off = locked & (status <= 0)
+
+    # Thứ tự dùng ngân sách: sector đang tắt bị khóa (chắc chắn mất traffic) trước, sau đó traffic tăng dần;
+    # sector đang bật bị khóa không thể tắt -> xếp cuối và không tính vào ngân sách
+    key = np.where(locked_off, -1.0, traffic)
+    key = np.where(locked_on, np.inf, key)
+    order = np.argsort(key, axis=-1, kind="stable")
+    lost = np.where(locked_on, 0.0, traffic)
+    cumulative = np.cumsum(np.take_along_axis(lost, order, axis=-1), axis=-1)
+    within = np.empty(cumulative.shape, dtype=bool)
+    np.put_along_axis(within, order, cumulative <= drop_budget * total, axis=-1)
+
+    must_on = ~within
+    can_off = within & ~locked_on
+    can_on = must_on | ~locked_off
+    return can_off, can_on
+
+def project_action(action, can_off, can_on):
+    """Chiếu action về tập hợp lệ của sleep_masks: sector không được tắt -> 1, không được bật -> 0"""
+    return np.where(~can_off, 1, np.where(~can_on, 0, action))
@@ -0,0 +1,56 @@
+import numpy as np
+
+
+class EpisodeSampler:
+    """
+    Lấy mẫu cửa sổ episode ngẫu nhiên trên trace dài (nhiều tuần).
+    Mỗi episode = (start, length); dữ liệu trả về là *view* (slice) của ma trận gốc,
+    không copy bộ nhớ.
+    """
+
+    STRATA = (None, "hour", "weekday", "hour_weekday")
+
+    def __init__(self, n_steps, window, interval_minutes=15, stratify=None):
+        if stratify not in self.STRATA:
+            raise ValueError(f"stratify phải là một trong {self.STRATA}, nhận được: {stratify}")
+
+        self.n_steps = n_steps
+        # Cửa sổ không thể dài hơn trace
+        self.window = min(int(window), n_steps)
+        self.interval_minutes = interval_minutes
+        self.stratify = stratify
+
+        # Các vị trí bắt đầu hợp lệ: [0, n_steps - window]
+        self.valid_starts = np.arange(n_steps - self.window + 1)
+
+        # Chia các vị trí bắt đầu theo tầng (giờ trong ngày / thứ trong tuần)
+        # Tính một lần lúc khởi tạo -> reset() chỉ tốn O(1)
+        if stratify is None:
+            self.strata = [self.valid_starts]
+        else:
+            keys = self.stratum_keys(self.valid_starts)
+            self.strata = [self.valid_starts[keys == k] for k in np.unique(keys)]
+
+    def hour_of_day(self, t):
+        return (np.asarray(t) * self.interval_minutes // 60) % 24
+
+    def weekday(self, t):
+        return (np.asarray(t) * self.interval_minutes // (24 * 60)) % 7
+
+    def stratum_keys(self, t):
+        if self.stratify == "hour":
+            return self.hour_of_day(t)
+        if self.stratify == "weekday":
+            return self.weekday(t)
+        return self.weekday(t) * 24 + self.hour_of_day(t)
+
+    def sample(self, rng):
+        """Chọn tầng đều nhau, rồi chọn vị trí bắt đầu đều trong tầng đó."""
+        stratum = self.strata[rng.integers(len(self.strata))]
+        start = int(stratum[rng.integers(len(stratum))])
+        return start, self.window
+
+    @staticmethod
+    def window_view(matrix, start, length):
+        # Basic slicing -> numpy trả về view, không copy
+        return matrix[start:start + length]
@@ -0,0 +1,106 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Thứ tự feature thêm vào observation (mỗi sector)
+FEATURE_NAMES = ("rolling_mean", "ewma", "slope", "yesterday")
+
+
+def feature_params(cfg, interval_minutes=None):
+    """(window, alpha, lag) từ cfg.features; lag mặc định = số bước trong 1 ngày (theo interval_minutes)"""
+    feat_cfg = cfg.get("features", {})
+    interval_minutes = interval_minutes or cfg.traffic.get("interval_minutes", 15)
+    lag = feat_cfg.get("lag_steps", None) or (24 * 60) // interval_minutes
+    return feat_cfg.get("window", 4), feat_cfg.get("ewma_alpha", 0.3), lag
+
+
+class RollingFeatures:
+    """
+    Feature xu hướng traffic theo từng sector, cập nhật O(1) mỗi bước:
+      - rolling_mean: trung bình `window` bước gần nhất (running sum trên ring buffer)
+      - ewma: trung bình trượt hàm mũ hệ số `alpha`
+      - slope: hệ số góc bình phương tối thiểu trên `window` bước (running sum có trọng số)
+      - yesterday: giá trị cùng thời điểm hôm qua (ring buffer dài `lag` bước)
+    Lúc khởi động, lịch sử được coi như lặp lại giá trị đầu tiên (mean = x0, slope = 0).
+    """
+
+    def __init__(self, n_sectors, window=4, alpha=0.3, lag=96):
+        if window < 2:
+            raise ValueError("window phải >= 2 để tính slope")
+        self.n_sectors = n_sectors
+        self.window = window
+        self.alpha = alpha
+        self.lag = lag
+
+        # Hằng số cho slope OLS với trục thời gian k = 0..W-1
+        self.k_mean = (window - 1) / 2
+        self.k_var = window * (window ** 2 - 1) / 12
+
+        self.buf = np.zeros((window, n_sectors))
+        self.lag_buf = np.zeros((lag, n_sectors))
+        self.features = np.zeros((n_sectors, len(FEATURE_NAMES)))
+
+        # Số bước lịch sử đủ để mọi feature quên trạng thái khởi động (EWMA còn sai số < 1e-12)
+        ewma_horizon = int(np.ceil(np.log(1e-12) / np.log(1 - alpha))) if 0 < alpha < 1 else 1
+        self.warmup = max(window, lag, ewma_horizon)
+
+    def reset(self, x0):
+        x0 = np.asarray(x0, dtype=float)
+        self.buf[:] = x0
+        self.lag_buf[:] = x0
+        self.pos = 0
+        self.lag_pos = 0
+        self.sum = self.window * x0
+        # sum_k = Σ k * y_k (k = 0 là bước cũ nhất)
+        self.sum_k = self.k_mean * self.sum
+        self.ewma = x0.copy()
+        self.yesterday = x0.copy()
+        return self._pack()
+
+    def update(self, x):
+        x = np.asarray(x, dtype=float)
+
+        # Ring buffer cửa sổ: bỏ phần tử cũ nhất, thêm x
+        oldest = self.buf[self.pos]
+        self.sum += x - oldest
+        self.sum_k += self.window * x - self.sum
+        self.buf[self.pos] = x
+        self.pos = (self.pos + 1) % self.window
+
+        self.ewma += self.alpha * (x - self.ewma)
+
+        # Giá trị cách đây `lag` bước chính là phần tử sắp bị ghi đè
+        self.yesterday = self.lag_buf[self.lag_pos].copy()
+        self.lag_buf[self.lag_pos] = x
+        self.lag_pos = (self.lag_pos + 1) % self.lag
+        return self._pack()
+
+    def _pack(self):
+        self.features[:, 0] = self.sum / self.window
+        self.features[:, 1] = self.ewma
+        self.features[:, 2] = (self.sum_k - self.k_mean * self.sum) / self.k_var
+        self.features[:, 3] = self.yesterday
+        return self.features
+
+    @staticmethod
+    def precompute(matrix, window=4, alpha=0.3, lag=96):
+        """
+        Tính sẵn feature cho cả trace (Steps, Sectors) -> (Steps, Sectors, 4), vectorized.
+        Hàng t bằng kết quả của reset(matrix[0]) rồi update(matrix[1..t]).
+        """
+        matrix = np.asarray(matrix, dtype=float)
+        x0 = matrix[:1]
+
+        # Đệm đầu trace bằng x0 (cùng quy ước khởi động với bản incremental)
+        padded = np.concatenate([np.repeat(x0, window - 1, axis=0), matrix])
+        windows = sliding_window_view(padded, window, axis=0)  # (Steps, Sectors, W), view
+        rolling_mean = windows.mean(axis=-1)
+        k = np.arange(window) - (window - 1) / 2
+        slope = windows @ k / (window * (window ** 2 - 1) / 12)
+
+        # EWMA: y_t = y_{t-1} + alpha * (x_t - y_{t-1}), y_0 = x_0
+        from scipy.signal import lfilter
+        ewma = lfilter([alpha], [1, alpha - 1], matrix, axis=0, zi=(1 - alpha) * x0)[0]
+
+        lagged = np.concatenate([np.repeat(x0, lag, axis=0), matrix])[:len(matrix)]
+
+        return np.stack([rolling_mean, ewma, slope, lagged], axis=-1)
@@ -0,0 +1,157 @@
+# envs/stress_test.py
+"""
+Stress test Monte-Carlo: từ traffic/users của env sinh hàng trăm biến thể (Scenarios, Steps, Sectors)
+(nhiễu nhân, khuếch đại giờ cao điểm, dịch thời gian, sector mất kết nối) rồi chạy tất cả cùng lúc
+trên BatchedTelecomEnv: mỗi bước chỉ 1 lần forward policy cho cả batch.
+Kết quả là chỉ số rủi ro đuôi (p95/p99 drop rate, giờ tệ nhất) thay vì trung bình 1 trace cố định.
+"""
+import numpy as np
+
+from envs.dynamics import build_obs, project_action, sleep_masks, step_kpis
+from envs.features import RollingFeatures, feature_params
+
+
+def perturb(traffic, users, scfg, rng):
+    """
+    (Steps, Sectors) -> traffic, users (Scenarios, Steps, Sectors) và outage (Scenarios, Steps, Sectors) bool.
+      - time_shift: mỗi scenario dịch vòng trace ±time_shift bước
+      - noise_std: nhiễu log-normal (trung bình 1) độc lập từng (bước, sector)
+      - peak_scale: mỗi scenario lấy hệ số g ∈ [1, peak_scale]; bước có tổng traffic càng gần đỉnh càng bị nhân gần g
+      - outage_prob: xác suất mỗi sector bị mất (buộc tắt) 1 đoạn outage_steps bước trong scenario
+    users được nhân cùng hệ số với traffic (tăng tải = thêm user).
+    """
+    n, (steps, sectors) = scfg.scenarios, traffic.shape
+
+    shift = rng.integers(-scfg.time_shift, scfg.time_shift + 1, size=n)
+    idx = (np.arange(steps)[None, :] + shift[:, None]) % steps  # (N, Steps)
+    base_traffic = traffic[idx]
+    base_users = users[idx].astype(float)
+
+    sigma = scfg.noise_std
+    scale = np.exp(sigma * rng.standard_normal((n, steps, sectors)) - sigma ** 2 / 2)
+
+    # Mức "cao điểm" của từng bước theo tổng traffic gốc, chuẩn hóa về [0, 1]
+    total = traffic.sum(axis=1)
+    peak = (total - total.min()) / max(float(np.ptp(total)), 1e-9)
+    gain = rng.uniform(1.0, scfg.peak_scale, size=n)
+    scale *= (1 + (gain[:, None] - 1) * peak[idx])[:, :, None]
+
+    outage = np.zeros((n, steps, sectors), dtype=bool)
+    hit = rng.random((n, sectors)) < scfg.outage_prob
+    length = min(scfg.outage_steps, steps)
+    start = rng.integers(0, steps - length + 1, size=(n, sectors))
+    t = np.arange(steps)[None, :, None]
+    outage[:] = hit[:, None, :] & (t >= start[:, None, :]) & (t < start[:, None, :] + length)
+
+    return base_traffic * scale, base_users * scale, outage
+
+
+class BatchedTelecomEnv:
+    """
+    Chạy song song N scenario với cùng công thức của TelecomEnv (build_obs / step_kpis / sleep_masks).
+    Bước t đọc traffic[:, t]; observation sau reset là hàng 0 (giống TelecomEnv).
+    Sector đang outage bị buộc tắt (mất toàn bộ traffic của nó, không tốn power).
+    """
+
+    def __init__(self, env, traffic, users, outage=None):
+        self.cfg = env.cfg
+        self.n_cells = env.n_cells
+        self.n_sectors = env.n_sectors
+        self.use_masking = env.use_masking
+        self.drop_budget = env.drop_budget
+        self.min_dwell = env.min_dwell
+        self.traffic = traffic
+        self.users = users
+        self.outage = outage
+        self.n_scenarios, self.steps, self.total_sectors = traffic.shape
+
+        self.feature_matrix = None
+        if env.use_features:
+            window, alpha, lag = feature_params(self.cfg, env.interval_minutes)
+            # precompute theo trục thời gian trên (Steps, N * Sectors) rồi tách lại scenario
+            flat = traffic.transpose(1, 0, 2).reshape(self.steps, -1)
+            feats = RollingFeatures.precompute(flat, window, alpha, lag)
+            self.feature_matrix = feats.reshape(self.steps, self.n_scenarios, self.total_sectors, -1)
+
+    def _get_obs(self, t):
+        features = None if self.feature_matrix is None else self.feature_matrix[t]
+        return build_obs(self.users[:, t], self.traffic[:, t], self.sector_status, features)
+
+    def reset(self):
+        self.current_step = 0
+        self.current_traffic = self.traffic[:, 0]
+        self.sector_status = np.ones((self.n_scenarios, self.total_sectors))
+        self.last_actions = np.ones((self.n_scenarios, self.total_sectors))
+        self.steps_since_switch = np.full((self.n_scenarios, self.total_sectors), self.min_dwell)
+        return self._get_obs(0)
+
+    def sector_masks(self):
+        return sleep_masks(
+            self.current_traffic, self.sector_status, self.steps_since_switch, self.drop_budget, self.min_dwell
+        )
+
+    def action_masks(self):
+        """(N, Sectors * 2) giống TelecomEnv.action_masks cho từng scenario"""
+        can_off, can_on = self.sector_masks()
+        return np.stack([can_off, can_on], axis=-1).reshape(self.n_scenarios, -1)
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=float)
+        if self.use_masking:
+            can_off, can_on = self.sector_masks()
+            actions = project_action(actions, can_off, can_on)
+
+        t = self.current_step
+        self.current_traffic = self.traffic[:, t]
+        if self.outage is not None:
+            actions = np.where(self.outage[:, t], 0, actions)
+
+        power, drop_rate, switches = step_kpis(
+            self.current_traffic, actions, self.last_actions, self.cfg, self.n_cells, self.n_sectors
+        )
+
+        self.steps_since_switch = np.where(actions != self.last_actions, 0, self.steps_since_switch + 1)
+        self.last_actions = actions
+        self.sector_status = actions
+        self.current_step += 1
+        done = self.current_step >= self.steps
+        return self._get_obs(t), done, {"power": power, "drop_rate": drop_rate, "switches": switches}
+
+
+def run_stress_test(env, policy, scfg, interval_minutes=15, rng=None):
+    """
+    policy(obs (N, D), batch_env) -> actions (N, Sectors). Trace gốc: env.traffic_matrix từ bước 0,
+    dài scfg.steps (null = toàn bộ). Trả về dict chỉ số tổng hợp + mảng drop (Scenarios, Steps).
+    """
+    rng = rng if rng is not None else np.random.default_rng(scfg.get("seed", None))
+    steps = scfg.get("steps", None) or env.max_data_steps
+    traffic, users, outage = perturb(env.traffic_matrix[:steps], env.user_matrix[:steps], scfg, rng)
+    batch_env = BatchedTelecomEnv(env, traffic, users, outage)
+
+    drop = np.zeros((batch_env.n_scenarios, steps))
+    power = np.zeros((batch_env.n_scenarios, steps))
+    obs = batch_env.reset()
+    for t in range(steps):
+        actions = policy(obs, batch_env)
+        obs, _, info = batch_env.step(actions)
+        drop[:, t] = info["drop_rate"]
+        power[:, t] = info["power"]
+
+    # Giờ trong ngày của từng bước -> giờ có drop trung bình (qua mọi scenario) cao nhất
+    hours = (np.arange(steps) * interval_minutes // 60) % 24
+    hourly = np.array([drop[:, hours == h].mean() if np.any(hours == h) else -1.0 for h in range(24)])
+    worst_hour = int(np.argmax(hourly))
+
+    episode_drop = drop.mean(axis=1)
+    return {
+        "scenarios": int(batch_env.n_scenarios),
+        "avg_power": float(power.mean()),
+        "avg_drop_rate": float(episode_drop.mean()),
+        "p95_drop_rate": float(np.percentile(episode_drop, 95)),
+        "p99_drop_rate": float(np.percentile(episode_drop, 99)),
+        "p99_step_drop_rate": float(np.percentile(drop, 99)),
+        "violation_rate": float(np.mean(episode_drop > env.cfg.rl.threshold_drop)),
+        "worst_hour": worst_hour,
+        "worst_hour_drop_rate": float(hourly[worst_hour]),
+        "drop": drop,
+    }
@@ -2,6 +2,9 @@ import gymnasium as gym
 import numpy as np
 from gymnasium import spaces
 from omegaconf import DictConfig
+from envs.episode_sampler import EpisodeSampler
+from envs.dynamics import build_obs, project_action, sector_kpis, sleep_masks, step_kpis
+from envs.features import FEATURE_NAMES, RollingFeatures, feature_params
 
 class TelecomEnv(gym.Env):
     # [QUAN TRỌNG] Thêm tham số data_pack=None vào đây
@@ -16,6 +19,13 @@ class TelecomEnv(gym.Env):
             self.traffic_matrix = data_pack['traffic'] # Shape: (Steps, Sectors)
             self.user_matrix = data_pack['users']      # Shape: (Steps, Sectors)
             self.max_data_steps = self.traffic_matrix.shape[0]
+            # Dataset đã gộp thô (utils/resample.py): traffic là tổng cả khối -> quy về lượng / interval gốc
+            # để capacity_sector và phân phối observation giống dataset gốc (policy dùng lại được)
+            base_interval = cfg.traffic.get("interval_minutes", 15)
+            self.interval_minutes = data_pack.get("interval_minutes", base_interval)
+            self.time_scale = self.interval_minutes / base_interval
+            if self.time_scale != 1:
+                self.traffic_matrix = self.traffic_matrix / self.time_scale
             print(f"   --> Env đã load {self.max_data_steps} bước dữ liệu từ Dataset.")
         else:
             # Nếu không có dataset, báo lỗi vì hệ thống mới yêu cầu phải có
@@ -25,9 +35,30 @@ class TelecomEnv(gym.Env):
         self.n_sectors = cfg.network.sectors_per_cell 
         self.total_sectors = self.n_cells * self.n_sectors
         
+        # Feature xu hướng traffic (rolling mean / EWMA / slope / hôm qua), tùy chọn
+        feat_cfg = cfg.get("features", {})
+        self.use_features = feat_cfg.get("rolling", False)
+        self.features = None
+        n_obs_per_sector = 4
+        if self.use_features:
+            window, alpha, lag = feature_params(cfg, self.interval_minutes)
+            n_obs_per_sector += len(FEATURE_NAMES)
+            precompute = feat_cfg.get("precompute", None)
+            if precompute is None:
+                # Dataset attach từ shared memory: không tạo thêm ma trận (Steps, Sectors, 4) riêng mỗi worker
+                precompute = "_shm" not in data_pack
+            if precompute:
+                # Tính 1 lần cho cả trace lúc load -> step chỉ còn lấy view theo index
+                self.feature_matrix = RollingFeatures.precompute(self.traffic_matrix, window, alpha, lag)
+                self.rolling = None
+            else:
+                self.feature_matrix = None
+                self.rolling = RollingFeatures(self.total_sectors, window, alpha, lag)
+
         # --- Config Spaces ---
         self.observation_space = spaces.Box(
-            low=0, high=100000, shape=(self.total_sectors * 4,), dtype=np.float32
+            low=-100000 if self.use_features else 0, high=100000,
+            shape=(self.total_sectors * n_obs_per_sector,), dtype=np.float32
         )
         self.action_space = spaces.MultiBinary(self.total_sectors)
         
@@ -37,75 +68,117 @@ class TelecomEnv(gym.Env):
         # [FIX] Khởi tạo biến đếm
         self.current_step = 0
 
+        # True: info có thêm KPI từng sector + time_index (dùng cho utils/accumulators.py khi evaluate)
+        self.track_sectors = False
+
+        # 2. Episode Sampler: cửa sổ ngẫu nhiên trên trace dài (tùy chọn)
+        # Mặc định (random_start=False) giữ hành vi cũ: chạy hết dataset từ t=0
+        self.sampler = None
+        if cfg.rl.get("random_start", False):
+            # rl.max_episode_steps tính theo interval gốc -> cửa sổ cùng khoảng thời gian thực
+            self.sampler = EpisodeSampler(
+                self.max_data_steps,
+                max(1, int(cfg.rl.max_episode_steps / self.time_scale)),
+                interval_minutes=self.interval_minutes,
+                stratify=cfg.rl.get("stratify", None),
+            )
+        self.episode_start = 0
+        self.episode_length = self.max_data_steps
+        self.ep_traffic = self.traffic_matrix
+        self.ep_users = self.user_matrix
+
+        # 3. Action masking / safety pruning (tùy chọn): chặn tắt sector làm vượt ngân sách drop
+        # và chặn bật/tắt liên tục (min_dwell bước), xem sleep_masks
+        mask_cfg = cfg.get("masking", {})
+        self.use_masking = mask_cfg.get("enabled", False)
+        drop_budget = mask_cfg.get("drop_budget", None)
+        self.drop_budget = cfg.rl.threshold_drop if drop_budget is None else drop_budget
+        self.min_dwell = mask_cfg.get("min_dwell", 2)
+        self.steps_since_switch = np.full(self.total_sectors, self.min_dwell)
+
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
         self.current_step = 0
+        options = options or {}
+
+        # Chọn cửa sổ episode: options['start'] (cố định, ví dụ khi evaluate) > sampler > toàn bộ trace
+        if "start" in options:
+            start = int(options["start"])
+            length = int(options.get("length", self.sampler.window if self.sampler else self.max_data_steps - start))
+        elif self.sampler is not None:
+            start, length = self.sampler.sample(self.np_random)
+        else:
+            start, length = 0, self.max_data_steps
+        if start < 0 or length <= 0 or start + length > self.max_data_steps:
+            raise ValueError(f"Cửa sổ episode [{start}, {start + length}) vượt ngoài dataset ({self.max_data_steps} bước)")
+
+        self.episode_start = start
+        self.episode_length = length
+        # View (không copy) vào ma trận gốc
+        self.ep_traffic = EpisodeSampler.window_view(self.traffic_matrix, start, length)
+        self.ep_users = EpisodeSampler.window_view(self.user_matrix, start, length)
         
-        # Lấy dữ liệu tại bước đầu tiên (t=0)
-        self.current_traffic = self.traffic_matrix[0]
-        self.current_users = self.user_matrix[0]
+        # Lấy dữ liệu tại bước đầu tiên của cửa sổ
+        self.current_traffic = self.ep_traffic[0]
+        self.current_users = self.ep_users[0]
+        self._update_features(0, restart=True)
         
         self.sector_status = np.ones(self.total_sectors)
         self.last_actions = np.ones(self.total_sectors)
+        self.steps_since_switch = np.full(self.total_sectors, self.min_dwell)
         
         return self._get_obs(), {}
 
+    def sector_masks(self):
+        """(can_off, can_on) cho action tiếp theo, tính từ traffic đang quan sát và trạng thái sector"""
+        return sleep_masks(
+            self.current_traffic, self.sector_status, self.steps_since_switch, self.drop_budget, self.min_dwell
+        )
+
+    def action_masks(self):
+        """Mask dạng MultiBinary của sb3_contrib MaskablePPO: (Sectors * 2,) = [được tắt, được bật] mỗi sector"""
+        can_off, can_on = self.sector_masks()
+        return np.stack([can_off, can_on], axis=1).reshape(-1)
+
+    def _update_features(self, t_idx, restart=False):
+        if not self.use_features:
+            return
+        if self.feature_matrix is not None:
+            self.features = self.feature_matrix[self.episode_start + t_idx]
+        elif restart:
+            # Incremental: làm nóng bằng lịch sử trước cửa sổ episode -> observation giống hệt chế độ precompute
+            start = self.episode_start
+            first = max(0, start - self.rolling.warmup)
+            self.features = self.rolling.reset(self.traffic_matrix[first])
+            for x in self.traffic_matrix[first + 1:start + 1]:
+                self.features = self.rolling.update(x)
+            self._feature_t = 0
+        elif t_idx != self._feature_t:
+            self.features = self.rolling.update(self.ep_traffic[t_idx])
+            self._feature_t = t_idx
+
     def _get_obs(self):
-        obs = np.stack([
-            self.current_users,
-            # Tránh chia cho 0
-            self.current_traffic / (self.current_users + 1e-9),
-            self.current_traffic,
-            self.sector_status
-        ], axis=1)
-        return obs.flatten().astype(np.float32)
+        return build_obs(self.current_users, self.current_traffic, self.sector_status, self.features)
 
     def step(self, action):
         cfg = self.cfg
+
+        if self.use_masking:
+            # Safety pruning: chiếu action về tập hợp lệ (áp dụng cả khi policy không dùng mask)
+            can_off, can_on = self.sector_masks()
+            action = project_action(action, can_off, can_on)
         
         # 1. Cập nhật dữ liệu Traffic theo thời gian thực (Time-series)
-        # Dùng phép chia lấy dư (%) để lặp lại dữ liệu nếu train lâu hơn 24h
-        t_idx = self.current_step % self.max_data_steps
-        self.current_traffic = self.traffic_matrix[t_idx]
-        self.current_users = self.user_matrix[t_idx]
-        
-        # 2. Tính toán Traffic phục vụ & Drop Rate
-        # (Logic đơn giản hóa để chạy nhanh, bạn có thể thay bằng logic topology phức tạp nếu cần)
-        
-        # Capacity thực tế = Capacity Sector * Trạng thái Bật/Tắt
-        available_capacity = action * cfg.network.capacity_sector
-        
-        # Traffic được phục vụ = Min(Nhu cầu, Khả năng đáp ứng)
-        served_traffic = np.minimum(self.current_traffic, available_capacity)
-        
-        # Tính tổng
-        total_demand_step = np.sum(self.current_traffic)
-        total_served_step = np.sum(served_traffic)
-        
-        # Drop Rate = Phần không được phục vụ / Tổng nhu cầu
-        if total_demand_step > 0:
-            drop_rate = 1.0 - (total_served_step / total_demand_step)
-        else:
-            drop_rate = 0.0
-            
-        # 3. Tính toán Năng lượng
-        # Công suất nền (cho các Cell có ít nhất 1 sector bật)
-        active_cells = 0
-        for i in range(self.n_cells):
-            # Kiểm tra xem cell thứ i có sector nào bật không
-            start = i * self.n_sectors
-            end = start + self.n_sectors
-            if np.sum(action[start:end]) > 0:
-                active_cells += 1
-                
-        active_sectors = np.sum(action)
-        
-        # P_Total = (Số Cell bật * P_Base) + (Số Sector bật * P_Sector)
-        total_power = (active_cells * cfg.energy.p_base) + (active_sectors * cfg.energy.p_sector_active)
-        
-        # Cộng phạt chuyển đổi trạng thái
-        switches = np.sum(np.abs(action - self.last_actions))
-        total_power += switches * cfg.energy.p_switch
+        # Dùng phép chia lấy dư (%) để lặp lại dữ liệu nếu train lâu hơn cửa sổ episode
+        t_idx = self.current_step % self.episode_length
+        self.current_traffic = self.ep_traffic[t_idx]
+        self.current_users = self.ep_users[t_idx]
+        self._update_features(t_idx)
+        
+        # 2-3. Traffic phục vụ, Drop Rate và Năng lượng
+        total_power, drop_rate, switches = step_kpis(
+            self.current_traffic, action, self.last_actions, cfg, self.n_cells, self.n_sectors
+        )
 
         # 4. Tính Reward (LLM Dynamic Reward)
         loc = {
@@ -127,17 +200,31 @@ class TelecomEnv(gym.Env):
             reward = -total_power - 1000 * drop_rate
 
         # 5. Update trạng thái
+        prev_actions = self.last_actions
+        self.steps_since_switch = np.where(action != prev_actions, 0, self.steps_since_switch + 1)
         self.last_actions = action
         self.sector_status = action
         self.current_step += 1
         
-        # Kết thúc khi hết dữ liệu trong file dataset (hoặc max_step config)
-        terminated = self.current_step >= self.max_data_steps
+        # Hết cửa sổ episode: chỉ là terminal thật khi cửa sổ chạm cuối dataset;
+        # cửa sổ ngẫu nhiên còn trace phía sau -> truncated (PPO vẫn bootstrap giá trị tương lai)
+        window_end = self.current_step >= self.episode_length
+        at_data_end = self.episode_start + self.episode_length >= self.max_data_steps
+        terminated = window_end and at_data_end
+        truncated = window_end and not at_data_end
         
         info = {
             "power": total_power, 
             "drop_rate": drop_rate, 
-            "switches": switches
+            "switches": switches,
+            "users_active": float(np.sum(self.current_users)),
+            # Action thực sự được áp dụng (sau safety pruning khi masking.enabled)
+            "action": action
         }
+        if self.track_sectors:
+            info["sector"] = sector_kpis(
+                self.current_traffic, action, prev_actions, cfg, self.n_cells, self.n_sectors
+            )
+            info["time_index"] = self.episode_start + t_idx
         
-        return self._get_obs(), reward, terminated, False, info
+        return self._get_obs(), reward, terminated, truncated, info
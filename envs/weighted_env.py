@@ -0,0 +1,60 @@
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+
+
+class WeightConditionedEnv(gym.Wrapper):
+    """
+    Multi-objective: reward = -power - w_drop * drop_rate - w_switch * switches,
+    với (w_drop, w_switch) được lấy mẫu mỗi episode và ghép (đã chuẩn hóa về [0, 1]) vào cuối observation.
+    1 policy học trên wrapper này bao phủ cả dải trọng số -> truy vấn Pareto front chỉ cần inference.
+
+    reset(options={"weights": (w_drop, w_switch)}) cố định trọng số (dùng khi đánh giá).
+    """
+
+    def __init__(self, env, w_drop_range=(100.0, 100000.0), w_switch_range=(0.0, 50.0)):
+        super().__init__(env)
+        self.w_drop_range = tuple(float(w) for w in w_drop_range)
+        self.w_switch_range = tuple(float(w) for w in w_switch_range)
+        if self.w_drop_range[0] <= 0:
+            raise ValueError("w_drop_range phải > 0 (lấy mẫu theo thang log)")
+
+        base = env.observation_space
+        self.observation_space = spaces.Box(
+            low=np.concatenate([base.low, np.zeros(2, dtype=np.float32)]),
+            high=np.concatenate([base.high, np.ones(2, dtype=np.float32)]),
+            dtype=np.float32,
+        )
+        self.weights = np.array([self.w_drop_range[1], self.w_switch_range[0]])
+
+    def sample_weights(self):
+        # w_drop trải nhiều bậc độ lớn -> log-uniform; w_switch -> uniform
+        rng = self.np_random
+        log_lo, log_hi = np.log(self.w_drop_range)
+        w_drop = np.exp(rng.uniform(log_lo, log_hi))
+        w_switch = rng.uniform(*self.w_switch_range)
+        return np.array([w_drop, w_switch])
+
+    def normalized_weights(self):
+        log_lo, log_hi = np.log(self.w_drop_range)
+        lo, hi = self.w_switch_range
+        return np.array([
+            (np.log(self.weights[0]) - log_lo) / max(log_hi - log_lo, 1e-9),
+            (self.weights[1] - lo) / max(hi - lo, 1e-9),
+        ], dtype=np.float32)
+
+    def _augment(self, obs):
+        return np.concatenate([obs, self.normalized_weights()]).astype(np.float32)
+
+    def reset(self, seed=None, options=None):
+        options = dict(options or {})
+        weights = options.pop("weights", None)
+        obs, info = self.env.reset(seed=seed, options=options)
+        self.weights = np.asarray(weights, dtype=float) if weights is not None else self.sample_weights()
+        return self._augment(obs), info
+
+    def step(self, action):
+        obs, _, terminated, truncated, info = self.env.step(action)
+        w_drop, w_switch = self.weights
+        reward = -info["power"] - w_drop * info["drop_rate"] - w_switch * info["switches"]
+        return self._augment(obs), float(reward), terminated, truncated, info
@@ -0,0 +1,196 @@
+# llm/surrogate.py
+import ast
+import json
+import os
+
+import numpy as np
+
+# Biến mà reward code được phép dùng (xem TelecomEnv.step)
+REWARD_VARS = ("power", "drop_rate", "switches", "users_active")
+
+
+def parse_coefficients(code):
+    """
+    Tách hệ số tuyến tính của reward code, ví dụ "reward = -power - 50000 * drop_rate - 20 * switches"
+    -> {"power": -1, "drop_rate": -50000, "switches": -20, "users_active": 0, "const": 0, "nonlinear": 0}.
+    Biểu thức không tuyến tính (hoặc code không parse được) -> nonlinear = 1.
+    """
+    coefs = {name: 0.0 for name in REWARD_VARS}
+    coefs["const"] = 0.0
+    coefs["nonlinear"] = 0.0
+
+    def linear(node):
+        # Trả về dict {biến: hệ số, "const": c} hoặc None nếu không tuyến tính
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return {"const": float(node.value)}
+        if isinstance(node, ast.Name) and node.id in REWARD_VARS:
+            return {node.id: 1.0}
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            inner = linear(node.operand)
+            if inner is None:
+                return None
+            sign = -1.0 if isinstance(node.op, ast.USub) else 1.0
+            return {k: sign * v for k, v in inner.items()}
+        if isinstance(node, ast.BinOp):
+            left, right = linear(node.left), linear(node.right)
+            if left is None or right is None:
+                return None
+            if isinstance(node.op, (ast.Add, ast.Sub)):
+                sign = 1.0 if isinstance(node.op, ast.Add) else -1.0
+                out = dict(left)
+                for k, v in right.items():
+                    out[k] = out.get(k, 0.0) + sign * v
+                return out
+            if isinstance(node.op, (ast.Mult, ast.Div)):
+                # Chỉ tuyến tính khi 1 vế là hằng số
+                for var, const in ((left, right), (right, left)):
+                    if set(const) == {"const"}:
+                        c = const["const"]
+                        if isinstance(node.op, ast.Div):
+                            if var is left and c != 0:
+                                c = 1.0 / c
+                            else:
+                                return None
+                        return {k: v * c for k, v in var.items()}
+            return None
+        return None
+
+    try:
+        tree = ast.parse(code or "")
+    except SyntaxError:
+        coefs["nonlinear"] = 1.0
+        return coefs
+
+    for stmt in tree.body:
+        if isinstance(stmt, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "reward" for t in stmt.targets):
+            terms = linear(stmt.value)
+            if terms is None:
+                coefs["nonlinear"] = 1.0
+            else:
+                for k, v in terms.items():
+                    coefs[k] = v
+        elif not isinstance(stmt, ast.Expr):
+            # if / for / gán biến phụ... -> coi là phi tuyến
+            coefs["nonlinear"] = 1.0
+    return coefs
+
+
+def reference_actions(traffic, name):
+    """Các policy tham chiếu rẻ: từ bật hết (drop thấp, power cao) tới tắt hết (drop cao, power thấp)"""
+    if name == "all_on":
+        return np.ones_like(traffic)
+    if name == "all_off":
+        return np.zeros_like(traffic)
+    # off_qXX: tắt các sector có traffic dưới phân vị XX của bước hiện tại
+    q = float(name.split("_q")[1])
+    return (traffic > np.percentile(traffic, q)).astype(float)
+
+
+REFERENCE_POLICIES = ("all_on", "off_q25", "off_q50", "all_off")
+
+
+def reference_rollouts(env, steps):
+    """
+    Chạy ngắn các policy tham chiếu trên env (không train), lưu KPI từng bước để relabel:
+    trả về mảng (policies, steps, len(REWARD_VARS)).
+    """
+    steps = min(steps, env.max_data_steps)
+    kpis = np.zeros((len(REFERENCE_POLICIES), steps, len(REWARD_VARS)))
+    for p, name in enumerate(REFERENCE_POLICIES):
+        env.reset(options={"start": 0, "length": steps})
+        for t in range(steps):
+            # Bước t của env đọc traffic ep_traffic[t]
+            action = reference_actions(env.ep_traffic[t], name)
+            _, _, _, _, info = env.step(action)
+            kpis[p, t] = (info["power"], info["drop_rate"], info["switches"], np.sum(env.current_users))
+    return kpis
+
+
+class RewardSurrogate:
+    """
+    Dự đoán avg_power / avg_drop_rate sau khi train đầy đủ, từ:
+      - hệ số parse được của reward code,
+      - điểm relabel: reward code chấm trên các rollout tham chiếu -> policy tham chiếu được ưa thích nhất
+        ("oracle") và KPI của nó.
+    Khi lịch sử còn ít (< min_history) dùng thẳng KPI oracle; sau đó dùng ridge regression,
+    fit lại mỗi khi có round mới (update). Lịch sử lưu JSON để dùng qua nhiều lần chạy.
+    """
+
+    def __init__(self, env, cfg, history_path=None):
+        scfg = cfg.surrogate
+        self.min_history = scfg.get("min_history", 3)
+        self.ridge = scfg.get("ridge", 1e-2)
+        self.history_path = history_path
+        self.kpis = reference_rollouts(env, scfg.get("rollout_steps", 96))
+        # KPI trung bình / bước của từng policy tham chiếu: (policies, 4)
+        self.reference_means = self.kpis.mean(axis=1)
+
+        self.history = []
+        if history_path and os.path.exists(history_path):
+            with open(history_path) as f:
+                self.history = json.load(f)
+        self.weights = None
+        self._fit()
+
+    def relabel(self, code):
+        """Tổng reward của code trên từng rollout tham chiếu (policies,)"""
+        compiled = compile(code, "<reward>", "exec")
+        scores = np.zeros(len(REFERENCE_POLICIES))
+        for p in range(len(REFERENCE_POLICIES)):
+            for power, drop_rate, switches, users in self.kpis[p]:
+                loc = {"power": power, "drop_rate": drop_rate, "switches": switches,
+                       "users_active": users, "reward": 0.0}
+                exec(compiled, {}, loc)
+                scores[p] += loc["reward"]
+        return scores
+
+    def features(self, code):
+        coefs = parse_coefficients(code)
+        try:
+            scores = self.relabel(code)
+        except Exception:
+            # Code lỗi -> env sẽ dùng reward fallback; đánh dấu nonlinear, không có oracle
+            scores = np.zeros(len(REFERENCE_POLICIES))
+            coefs["nonlinear"] = 1.0
+        best = int(np.argmax(scores))
+        oracle_power, oracle_drop = self.reference_means[best, 0], self.reference_means[best, 1]
+
+        # Hệ số trải nhiều bậc độ lớn -> signed log
+        slog = lambda v: float(np.sign(v) * np.log1p(abs(v)))
+        return [
+            1.0,
+            slog(coefs["power"]), slog(coefs["drop_rate"]), slog(coefs["switches"]), slog(coefs["users_active"]),
+            coefs["nonlinear"],
+            best / (len(REFERENCE_POLICIES) - 1),
+            float(oracle_power), float(oracle_drop),
+        ]
+
+    def _fit(self):
+        if len(self.history) < self.min_history:
+            self.weights = None
+            return
+        X = np.array([h["features"] for h in self.history])
+        Y = np.array([h["targets"] for h in self.history])
+        A = X.T @ X + self.ridge * np.eye(X.shape[1])
+        self.weights = np.linalg.solve(A, X.T @ Y)
+
+    def predict(self, code):
+        """Trả về (features, {"avg_power": ..., "avg_drop_rate": ...})"""
+        x = self.features(code)
+        if self.weights is None:
+            power, drop = x[-2], x[-1]
+        else:
+            power, drop = np.array(x) @ self.weights
+        return x, {"avg_power": float(power), "avg_drop_rate": float(np.clip(drop, 0.0, 1.0))}
+
+    def update(self, features, metrics):
+        """Thêm kết quả round vừa train xong, fit lại và lưu lịch sử"""
+        self.history.append({
+            "features": [float(v) for v in features],
+            "targets": [float(metrics["avg_power"]), float(metrics["avg_drop_rate"])],
+        })
+        self._fit()
+        if self.history_path:
+            os.makedirs(os.path.dirname(self.history_path) or ".", exist_ok=True)
+            with open(self.history_path, "w") as f:
+                json.dump(self.history, f)
@@ -1,30 +1,27 @@
 # main.py
-import hydra
+import json
 import os
-import matplotlib.pyplot as plt
-import numpy as np
-from omegaconf import DictConfig, OmegaConf
-from envs.telecom_env import TelecomEnv
-from utils.read import load_dataset
-from llm.reward_designer import LLMRewardDesigner
-from agents.ppo_agent import DRLAgent
-
-# Thêm tham số dataset_name vào config khi chạy
-@hydra.main(version_base=None, config_path="conf", config_name="config")
-def main(cfg: DictConfig):
+from omegaconf import DictConfig
+from utils.naming import get_dataset_name, model_filename, surrogate_history_path
+
+# Các module nặng (gymnasium, stable_baselines3/torch, matplotlib, hydra) được import trong hàm
+# để `python cli.py create/plot/...` không phải trả chi phí khởi động của chúng
+
+def run(cfg: DictConfig, project_root="."):
+    from envs.telecom_env import TelecomEnv
+    from utils.read import load_dataset
+    from llm.reward_designer import LLMRewardDesigner
+    from agents.ppo_agent import DRLAgent
+
     # 1. Xác định tên dataset (từ command line hoặc config mặc định)
-    # Ví dụ: python main.py dataset_name="data_C5_S24_U50"
-    if "dataset_name" not in cfg:
-        # Nếu không nhập, thử tự đoán tên mặc định dựa trên config hiện tại
-        dataset_name = f"data_C{cfg.network.num_cells}_S{cfg.traffic.simulation_steps}_U{cfg.traffic.max_users}"
-    else:
-        dataset_name = cfg.dataset_name
+    dataset_name = get_dataset_name(cfg)
 
     print(f"=== Đang chạy với Dataset: {dataset_name} ===")
     
     # 2. Load Data
     try:
-        data_pack = load_dataset(dataset_name)
+        # shared_dataset=true: attach vào bản shared memory nếu DatasetBroker đã publish
+        data_pack = load_dataset(dataset_name, shared=cfg.get("shared_dataset", False))
     except FileNotFoundError:
         print("❌ Lỗi: Chưa tạo dataset. Hãy chạy 'python utils/create.py' trước!")
         return
@@ -36,6 +33,13 @@ def main(cfg: DictConfig):
     
     history_power = []
     history_drop = []
+
+    # Surrogate (tùy chọn): loại reward code dự đoán vi phạm threshold_drop trước khi tốn công train
+    surrogate = None
+    scfg = cfg.get("surrogate", {})
+    if scfg.get("enabled", False):
+        from llm.surrogate import RewardSurrogate
+        surrogate = RewardSurrogate(env, cfg, surrogate_history_path(cfg, dataset_name, project_root))
     
     # 4. Vòng lặp Tiến hóa
     rounds = cfg.llm.simulation_rounds
@@ -45,10 +49,30 @@ def main(cfg: DictConfig):
         print(f"\n--- ROUND {i+1} ---")
         reward_code = llm.generate_code(feedback)
         print(f"Reward: {reward_code}")
+
+        if surrogate is not None:
+            for _ in range(scfg.max_retries):
+                features, predicted = surrogate.predict(reward_code)
+                if predicted["avg_drop_rate"] <= cfg.rl.threshold_drop:
+                    break
+                # Bị loại: báo lại cho LLM và sinh candidate mới, không tốn agent.train()
+                print(f"⏭️  Surrogate loại candidate: dự đoán Drop={predicted['avg_drop_rate']*100:.2f}%")
+                feedback = (f"REJECTED. Predicted Drop Rate {predicted['avg_drop_rate']:.2f} > "
+                            f"{cfg.rl.threshold_drop}. Reduce drop rate!")
+                reward_code = llm.generate_code(feedback)
+                print(f"Reward: {reward_code}")
+            else:
+                # Hết lượt thử thì vẫn train candidate cuối để vòng lặp không bị kẹt
+                # (candidate được chấp nhận ở trên giữ nguyên features, không relabel lại)
+                features, predicted = surrogate.predict(reward_code)
+
         env.reward_function_code = reward_code
         
         agent.train()
         metrics = agent.evaluate(episodes=5)
+
+        if surrogate is not None:
+            surrogate.update(features, metrics)
         
         p, d = metrics['avg_power'], metrics['avg_drop_rate']
         history_power.append(p)
@@ -61,26 +85,28 @@ def main(cfg: DictConfig):
         else:
             feedback = "GOOD. Focus on saving power."
 
-    # 5. Vẽ và Lưu biểu đồ (Figures)
-    save_fig_dir = os.path.join(hydra.utils.get_original_cwd(), "figures")
+    # 5. Lưu policy của round cuối (dùng cho serving/policy_server.py)
+    save_model_dir = os.path.join(project_root, "models")
+    os.makedirs(save_model_dir, exist_ok=True)
+    agent.save(os.path.join(save_model_dir, model_filename(cfg, dataset_name)))
+
+    # 6. Lưu lịch sử (để `python cli.py plot` vẽ lại) và biểu đồ (Figures)
+    from utils.plot import plot_history
+
+    save_fig_dir = os.path.join(project_root, "figures")
     os.makedirs(save_fig_dir, exist_ok=True)
-    
-    plt.figure(figsize=(10, 5))
-    plt.subplot(1, 2, 1)
-    plt.plot(history_power, marker='o', color='b')
-    plt.title("Average Power Consumption")
-    plt.xlabel("Round")
-    plt.ylabel("Watts")
-    
-    plt.subplot(1, 2, 2)
-    plt.plot(np.array(history_drop)*100, marker='s', color='r')
-    plt.title("Average Drop Rate")
-    plt.xlabel("Round")
-    plt.ylabel("Drop Rate (%)")
-    
+    with open(os.path.join(save_fig_dir, f"history_{dataset_name}.json"), "w") as f:
+        json.dump({"power": history_power, "drop_rate": history_drop}, f)
+
     fig_name = f"result_{dataset_name}.png"
-    plt.savefig(os.path.join(save_fig_dir, fig_name))
+    plot_history(history_power, history_drop, os.path.join(save_fig_dir, fig_name))
     print(f"\n📊 Đã lưu biểu đồ kết quả tại: figures/{fig_name}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import hydra
+
+    @hydra.main(version_base=None, config_path="conf", config_name="config")
+    def main(cfg: DictConfig):
+        run(cfg, hydra.utils.get_original_cwd())
+
+    main()
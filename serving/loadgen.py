@@ -0,0 +1,81 @@
+# serving/loadgen.py
+import argparse
+import json
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+from utils.kpi import sector_names
+
+
+def random_snapshot(names, rng, max_users=50):
+    """Snapshot KPI ngẫu nhiên theo schema kpi_data.csv"""
+    users = rng.integers(5, max_users, len(names))
+    traffic = users * rng.uniform(2.0, 10.0, len(names))
+    return [
+        {
+            "timestamp": "2026-01-01 00:00:00",
+            "enodeb": int(name.split("_")[0]),
+            "cell_name": name,
+            "ps_traffic_mb": round(float(t), 2),
+            "avg_rrc_connected_user": int(u),
+            "prb_dl_used": 0.0,
+        }
+        for name, u, t in zip(names, users, traffic)
+    ]
+
+
+def post_json(url, body):
+    req = urllib.request.Request(url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req) as resp:
+        return json.loads(resp.read())
+
+
+def run_load(url, names, concurrency=16, requests_per_worker=100, seed=0):
+    """Bắn request đồng thời từ `concurrency` thread, trả về latency phía client (giây)"""
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        rng = np.random.default_rng(seed + worker_id)
+        local = []
+        for _ in range(requests_per_worker):
+            body = {"rows": random_snapshot(names, rng)}
+            start = time.perf_counter()
+            post_json(f"{url}/predict", body)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return np.array(latencies), elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator cho serving/policy_server.py")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--num-cells", type=int, default=5)
+    parser.add_argument("--sectors-per-cell", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=100, help="Số request mỗi thread")
+    args = parser.parse_args(argv)
+
+    names = sector_names(args.num_cells, args.sectors_per_cell)
+    latencies, elapsed = run_load(args.url, names, args.concurrency, args.requests)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(f"📈 {len(latencies)} request trong {elapsed:.2f}s ({len(latencies) / elapsed:.0f} req/s)")
+    print(f"   Client: p50={p50:.2f}ms, p99={p99:.2f}ms")
+    with urllib.request.urlopen(f"{args.url}/metrics") as resp:
+        print(f"   Server: {json.loads(resp.read())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# serving/online_controller.py
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+from envs.features import RollingFeatures, feature_params
+from envs.dynamics import build_obs, project_action, sleep_masks, step_kpis
+from serving.policy_server import masking_params
+from utils.kpi import KPI_COLUMNS, rows_to_arrays, sector_index
+
+
+def tail_lines(path, follow=True, poll_interval=1.0):
+    """
+    Đọc file KPI đang được ghi thêm (giống `tail -f`), '-' = stdin.
+    Chỉ yield dòng hoàn chỉnh (có '\\n'); dòng đang ghi dở được giữ lại tới khi đủ.
+    """
+    f = sys.stdin if path == "-" else open(path, "r", newline="")
+    pending = ""
+    try:
+        while True:
+            line = f.readline()
+            if line:
+                pending += line
+                if pending.endswith("\n"):
+                    yield pending
+                    pending = ""
+                continue
+            if not follow or path == "-":
+                break
+            time.sleep(poll_interval)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def read_kpi_rows(lines):
+    """Dòng CSV -> dict theo schema kpi_data.csv (bỏ qua header)"""
+    for values in csv.reader(lines):
+        if not values or values[0] == "timestamp":
+            continue
+        yield dict(zip(KPI_COLUMNS, values))
+
+
+def group_intervals(rows, expected=None):
+    """
+    Gom các dòng liên tiếp cùng timestamp thành 1 interval 15 phút. Chỉ giữ interval hiện tại trong RAM.
+    expected: tập cell_name của topology -> interval được trả về ngay khi mọi sector đã báo cáo
+    (không phải chờ dòng của timestamp tiếp theo, tránh trễ 1 interval khi tail feed live).
+    Interval thiếu sector vẫn được trả về khi timestamp tiếp theo xuất hiện (hoặc hết stream).
+    Dòng tới muộn của interval đã trả về bị bỏ qua.
+    """
+    current_ts, batch, seen = None, [], set()
+    emitted_ts = None
+    for row in rows:
+        ts = row["timestamp"]
+        if ts == emitted_ts:
+            print(f"⚠️ Bỏ dòng tới muộn của interval đã xử lý {ts}: {row.get('cell_name')}", file=sys.stderr)
+            continue
+        if ts != current_ts and batch:
+            yield current_ts, batch
+            batch, seen = [], set()
+        current_ts = ts
+        batch.append(row)
+        if expected is not None:
+            seen.add(str(row.get("cell_name")))
+            if expected <= seen:
+                yield current_ts, batch
+                emitted_ts, batch, seen = current_ts, [], set()
+    if batch:
+        yield current_ts, batch
+
+
+class RunningKPIs:
+    """Accumulator O(1): tổng/trung bình power, drop rate, switches trên toàn bộ thời gian chạy"""
+
+    def __init__(self):
+        self.steps = 0
+        self.total_power = 0.0
+        self.total_drop = 0.0
+        self.total_switches = 0.0
+        self.max_drop = 0.0
+        # Dòng KPI lỗi bị bỏ qua và interval không còn dòng hợp lệ nào
+        self.bad_rows = 0
+        self.skipped_intervals = 0
+
+    def update(self, power, drop_rate, switches):
+        self.steps += 1
+        self.total_power += float(power)
+        self.total_drop += float(drop_rate)
+        self.total_switches += float(switches)
+        self.max_drop = max(self.max_drop, float(drop_rate))
+
+    def summary(self):
+        n = max(self.steps, 1)
+        return {
+            "steps": self.steps,
+            "avg_power": self.total_power / n,
+            "avg_drop_rate": self.total_drop / n,
+            "avg_switches": self.total_switches / n,
+            "max_drop_rate": self.max_drop,
+            "bad_rows": self.bad_rows,
+            "skipped_intervals": self.skipped_intervals,
+        }
+
+
+class OnlineController:
+    """
+    Controller online: nhận KPI từng interval, cập nhật trạng thái sector, gọi policy,
+    tính KPI theo đúng công thức của TelecomEnv. Trạng thái có kích thước cố định (Sectors,),
+    không giữ lịch sử -> chạy nhiều tuần với bộ nhớ không đổi.
+    """
+
+    def __init__(self, policy, cfg, n_cells, masked=False):
+        self.policy = policy
+        self.masked = masked
+        self.cfg = cfg
+        self.n_cells = n_cells
+        self.n_sectors = cfg.network.sectors_per_cell
+        self.index = sector_index(n_cells, self.n_sectors)
+        total = len(self.index)
+
+        self.sector_status = np.ones(total)
+        self.kpis = RunningKPIs()
+
+        # Feature xu hướng cập nhật O(1) mỗi interval (cùng cấu hình với TelecomEnv)
+        self.use_features = cfg.get("features", {}).get("rolling", False)
+        self.rolling = RollingFeatures(total, *feature_params(cfg))
+        self.started = False
+
+        # Safety pruning giống TelecomEnv.step khi masking.enabled (policy train với mask cần cùng ràng buộc)
+        self.masking = masking_params(cfg)
+        min_dwell = self.masking[1] if self.masking else 0
+        self.steps_since_switch = np.full(total, min_dwell)
+
+    def step(self, rows):
+        users, traffic, _ = rows_to_arrays(rows, self.index)
+        return self._decide(users, traffic)
+
+    def _decide(self, users, traffic):
+
+        if not self.started:
+            features = self.rolling.reset(traffic)
+            self.started = True
+        else:
+            features = self.rolling.update(traffic)
+
+        obs = build_obs(users, traffic, self.sector_status, features if self.use_features else None)
+        if self.masking is None:
+            action, _ = self.policy.predict(obs, deterministic=True)
+        else:
+            can_off, can_on = sleep_masks(traffic, self.sector_status, self.steps_since_switch, *self.masking)
+            if self.masked:
+                mask = np.stack([can_off, can_on], axis=1).reshape(-1)
+                action, _ = self.policy.predict(obs, deterministic=True, action_masks=mask)
+            else:
+                action, _ = self.policy.predict(obs, deterministic=True)
+            action = project_action(action, can_off, can_on)
+        action = np.asarray(action)
+        self.steps_since_switch = np.where(action != self.sector_status, 0, self.steps_since_switch + 1)
+
+        power, drop_rate, switches = step_kpis(
+            traffic, action, self.sector_status, self.cfg, self.n_cells, self.n_sectors
+        )
+        self.kpis.update(power, drop_rate, switches)
+        self.sector_status = action
+        return action, power, drop_rate, switches
+
+    def run(self, intervals, out, write_header=True):
+        """intervals: iterator (timestamp, rows). out: file-like, ghi 1 dòng quyết định / interval"""
+        writer = csv.writer(out)
+        if write_header:
+            writer.writerow(["timestamp", "decisions", "active_sectors", "power", "drop_rate", "switches"])
+        for ts, rows in intervals:
+            # Dòng lỗi (cell_name lạ, giá trị không phải số) chỉ bị bỏ qua, controller tiếp tục chạy
+            errors = []
+            users, traffic, _ = rows_to_arrays(rows, self.index, errors=errors)
+            for row, e in errors:
+                print(f"⚠️ Bỏ dòng KPI lỗi tại {ts}: {e!r}", file=sys.stderr)
+            self.kpis.bad_rows += len(errors)
+            if len(errors) == len(rows):
+                self.kpis.skipped_intervals += 1
+                continue
+            action, power, drop_rate, switches = self._decide(users, traffic)
+            decisions = "".join(str(int(a)) for a in action)
+            writer.writerow([ts, decisions, int(np.sum(action)), round(float(power), 2),
+                             round(float(drop_rate), 6), int(switches)])
+            out.flush()
+        return self.kpis.summary()
+
+
+def run_online(policy, cfg, input_path, output_path, follow=True, poll_interval=1.0, masked=False):
+    controller = OnlineController(policy, cfg, cfg.network.num_cells, masked)
+
+    lines = tail_lines(input_path, follow=follow, poll_interval=poll_interval)
+    intervals = group_intervals(read_kpi_rows(lines), expected=set(controller.index))
+    print(f"📡 Online controller: {input_path} -> {output_path}")
+    # Ghi nối tiếp nếu file quyết định đã tồn tại (controller khởi động lại)
+    resume = os.path.exists(output_path)
+    with open(output_path, "a" if resume else "w", newline="") as out:
+        try:
+            summary = controller.run(intervals, out, write_header=not resume)
+        except KeyboardInterrupt:
+            summary = controller.kpis.summary()
+    print(f"✅ Dừng controller. KPI: {summary}")
+    return summary
+
+
+def main(argv=None):
+    from omegaconf import OmegaConf
+    from agents.ppo_agent import load_policy
+
+    parser = argparse.ArgumentParser(description="Online controller: tail KPI feed và ra quyết định sleep từng interval")
+    parser.add_argument("--model", required=True, help="File policy đã train (.zip của stable_baselines3 / sb3_contrib)")
+    parser.add_argument("--input", required=True, help="KPI CSV (schema kpi_data.csv) hoặc '-' cho stdin")
+    parser.add_argument("--output", default="decisions.csv")
+    parser.add_argument("--config", default="conf/config.yaml")
+    parser.add_argument("--no-follow", action="store_true", help="Dừng khi hết file thay vì chờ dữ liệu mới")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    cfg = OmegaConf.load(args.config)
+    policy, masked = load_policy(args.model, cfg, device="cpu")
+    run_online(policy, cfg, args.input, args.output, not args.no_follow, args.poll_interval, masked)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# serving/policy_server.py
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from envs.dynamics import build_obs, project_action, sleep_masks
+from utils.kpi import rows_to_arrays, sector_index
+
+
+class LatencyTracker:
+    """Lưu N latency gần nhất (ring buffer) để tính p50/p99 với bộ nhớ cố định"""
+
+    def __init__(self, window=10000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def add(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        with self.lock:
+            samples = np.array(self.samples)
+            count = self.count
+        if len(samples) == 0:
+            return {"count": count, "p50_ms": None, "p99_ms": None}
+        p50, p99 = np.percentile(samples, [50, 99]) * 1000
+        return {"count": count, "p50_ms": round(float(p50), 3), "p99_ms": round(float(p99), 3)}
+
+
+class MicroBatcher:
+    """
+    Gom các request đồng thời thành 1 batch -> 1 lần forward policy.
+    Thread nền chờ tối đa max_wait_ms (hoặc đủ max_batch) rồi gọi policy.predict trên cả batch.
+    """
+
+    def __init__(self, policy, max_batch=64, max_wait_ms=2.0):
+        self.policy = policy
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self.batch_sizes = LatencyTracker()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def submit(self, obs, mask=None):
+        # mask: action_masks của MaskablePPO cho request này (None với PPO thường)
+        future = Future()
+        self.queue.put((obs, mask, future))
+        return future
+
+    def _loop(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            obs = np.stack([item[0] for item in batch])
+            try:
+                if batch[0][1] is not None:
+                    masks = np.stack([item[1] for item in batch])
+                    actions, _ = self.policy.predict(obs, deterministic=True, action_masks=masks)
+                else:
+                    actions, _ = self.policy.predict(obs, deterministic=True)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batch_sizes.add(len(batch))
+            for (_, _, future), action in zip(batch, actions):
+                future.set_result(action)
+
+
+class PolicyService:
+    """Policy đã train + topology -> quyết định bật/tắt từng sector từ 1 snapshot KPI"""
+
+    def __init__(self, policy, graph, sectors_per_cell, max_batch=64, max_wait_ms=2.0, features=None,
+                 masking=None, masked_policy=False):
+        self.graph = graph
+        self.index = sector_index(graph.num_cells, sectors_per_cell)
+        self.sector_names = list(self.index)
+        self.batcher = MicroBatcher(policy, max_batch, max_wait_ms)
+        self.latency = LatencyTracker()
+
+        # features=(window, alpha, lag): policy train với features.rolling -> mỗi stream (payload["stream"])
+        # giữ 1 RollingFeatures riêng, cập nhật theo thứ tự các snapshot gửi tới
+        self.features = features
+        self.streams = {}
+        self.streams_lock = threading.Lock()
+
+        # masking=(drop_budget, min_dwell): cùng safety pruning với TelecomEnv.step (envs/dynamics.sleep_masks)
+        self.masking = masking
+        self.masked_policy = masked_policy
+
+    def _stream_features(self, stream, traffic):
+        from envs.features import RollingFeatures
+
+        with self.streams_lock:
+            rolling = self.streams.get(stream)
+            if rolling is None:
+                rolling = self.streams[stream] = RollingFeatures(len(self.index), *self.features)
+                return rolling.reset(traffic).copy()
+            return rolling.update(traffic).copy()
+
+    def decide(self, payload):
+        start = time.perf_counter()
+        users, traffic, _ = rows_to_arrays(payload["rows"], self.index)
+        # Trạng thái hiện tại của sector (mặc định: tất cả đang bật, như TelecomEnv.reset)
+        status = np.asarray(payload.get("sector_status", np.ones(len(self.index))), dtype=float)
+        features = None
+        if self.features is not None:
+            features = self._stream_features(str(payload.get("stream", "default")), traffic)
+        obs = build_obs(users, traffic, status, features)
+
+        if self.masking is None:
+            action = self.batcher.submit(obs).result()
+        else:
+            # Số bước từ lần bật/tắt gần nhất của từng sector (mặc định: không khóa, như TelecomEnv.reset)
+            drop_budget, min_dwell = self.masking
+            since = np.asarray(payload.get("steps_since_switch", np.full(len(self.index), min_dwell)))
+            can_off, can_on = sleep_masks(traffic, status, since, drop_budget, min_dwell)
+            mask = np.stack([can_off, can_on], axis=1).reshape(-1) if self.masked_policy else None
+            action = project_action(self.batcher.submit(obs, mask).result(), can_off, can_on)
+        self.latency.add(time.perf_counter() - start)
+        return {
+            "decisions": {name: int(a) for name, a in zip(self.sector_names, action)},
+            "active_sectors": int(np.sum(action)),
+        }
+
+    def metrics(self):
+        batch = self.batcher.batch_sizes
+        with batch.lock:
+            avg_batch = float(np.mean(batch.samples)) if batch.samples else None
+        return {"latency": self.latency.summary(), "forward_passes": batch.count, "avg_batch_size": avg_batch}
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, body):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send(200, service.metrics())
+            elif self.path == "/health":
+                self._send(200, {"status": "ok"})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length))
+                self._send(200, service.decide(payload))
+            except (KeyError, ValueError, TypeError) as e:
+                self._send(400, {"error": str(e)})
+            except Exception as e:
+                # Lỗi phía server (kể cả lỗi predict do MicroBatcher chuyển qua future) -> vẫn trả status cho client
+                self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+        def log_message(self, format, *args):
+            pass  # Tắt log mỗi request để không ảnh hưởng latency
+
+    return Handler
+
+
+def serve(service, host="127.0.0.1", port=8080):
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"🚀 Policy service đang chạy tại http://{host}:{port} (POST /predict, GET /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def masking_params(cfg):
+    """(drop_budget, min_dwell) khi masking.enabled (cùng mặc định với TelecomEnv), ngược lại None"""
+    mask_cfg = cfg.get("masking", {})
+    if not mask_cfg.get("enabled", False):
+        return None
+    drop_budget = mask_cfg.get("drop_budget", None)
+    return (cfg.rl.threshold_drop if drop_budget is None else drop_budget), mask_cfg.get("min_dwell", 2)
+
+
+def load_service(model_path, dataset_name, cfg, max_batch=64, max_wait_ms=2.0):
+    from agents.ppo_agent import load_policy
+    from envs.features import FEATURE_NAMES, feature_params
+    from utils.read import load_dataset
+
+    policy, masked = load_policy(model_path, cfg, device="cpu")
+    graph = load_dataset(dataset_name)["topology"]
+
+    # Layout observation phải khớp với lúc train (features.rolling thêm feature xu hướng mỗi sector)
+    features = feature_params(cfg) if cfg.get("features", {}).get("rolling", False) else None
+    n_sectors = graph.num_cells * cfg.network.sectors_per_cell
+    expected = n_sectors * (4 + (len(FEATURE_NAMES) if features else 0))
+    actual = getattr(policy, "obs_dim", None) or policy.observation_space.shape[0]
+    if actual != expected:
+        raise ValueError(
+            f"Policy {model_path} nhận observation {actual} chiều nhưng config cho {expected} chiều "
+            f"(features.rolling={features is not None}); dùng cùng config với lúc train"
+        )
+    return PolicyService(policy, graph, cfg.network.sectors_per_cell, max_batch, max_wait_ms, features,
+                         masking_params(cfg), masked)
+
+
+def main(argv=None):
+    from omegaconf import OmegaConf
+
+    parser = argparse.ArgumentParser(description="Local inference service cho quyết định sleep sector")
+    parser.add_argument("--model", required=True, help="File policy đã train (.zip của stable_baselines3 / sb3_contrib)")
+    parser.add_argument("--dataset", required=True, help="Tên dataset để lấy NetworkGraph")
+    parser.add_argument("--config", default="conf/config.yaml")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    cfg = OmegaConf.load(args.config)
+    service = load_service(args.model, args.dataset, cfg, args.max_batch, args.max_wait_ms)
+    serve(service, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
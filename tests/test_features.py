@@ -0,0 +1,36 @@
+import numpy as np
+from omegaconf import OmegaConf
+
+from envs.telecom_env import TelecomEnv
+from utils.topology import NetworkGraph
+
+
+def make_env(precompute, steps=96 * 4, sectors=15, seed=0):
+    cfg = OmegaConf.load("conf/config.yaml")
+    cfg.features.rolling = True
+    cfg.features.precompute = precompute
+    rng = np.random.default_rng(seed)
+    pack = {
+        "topology": NetworkGraph(5),
+        "traffic": rng.uniform(0, 200, (steps, sectors)),
+        "users": rng.integers(5, 50, (steps, sectors)).astype(float),
+    }
+    return TelecomEnv(cfg, pack)
+
+
+def test_incremental_features_match_precompute():
+    pre, inc = make_env(True), make_env(False)
+    assert pre.feature_matrix is not None and inc.feature_matrix is None
+
+    rng = np.random.default_rng(1)
+    # Cửa sổ ngắn hơn lag 1 ngày, bắt đầu ở đầu trace, giữa trace và sát cuối
+    for start in (0, 5, 150, pre.max_data_steps - 24):
+        options = {"start": start, "length": 24}
+        obs_pre, _ = pre.reset(options=options)
+        obs_inc, _ = inc.reset(options=options)
+        np.testing.assert_allclose(obs_inc, obs_pre, rtol=1e-9, atol=1e-6)
+        for _ in range(24):
+            action = rng.integers(0, 2, pre.total_sectors)
+            obs_pre, *_ = pre.step(action)
+            obs_inc, *_ = inc.step(action)
+            np.testing.assert_allclose(obs_inc, obs_pre, rtol=1e-9, atol=1e-6)
@@ -0,0 +1,51 @@
+import gc
+import multiprocessing as mp
+import uuid
+
+import numpy as np
+from omegaconf import OmegaConf
+
+from utils.shared_data import DatasetBroker
+from utils.topology import NetworkGraph
+
+
+def make_pack(steps=96, sectors=15, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "topology": NetworkGraph(5),
+        "traffic": rng.uniform(0, 200, (steps, sectors)),
+        "users": rng.integers(5, 50, (steps, sectors)).astype(float),
+        "prb": rng.uniform(0, 100, (steps, sectors)),
+    }
+
+
+def _worker(name, queue):
+    # Process riêng (như worker / cli.py evaluate): chỉ có handle do attach_dataset tạo
+    from envs.telecom_env import TelecomEnv
+    from utils.shared_data import attach_dataset
+
+    cfg = OmegaConf.load("conf/config.yaml")
+    env = TelecomEnv(cfg, attach_dataset(name))
+    gc.collect()  # data_pack tạm đã bị bỏ -> segment phải còn được giữ bởi các array của env
+
+    env.reset()
+    for _ in range(10):
+        env.step(np.ones(env.total_sectors))
+    queue.put((float(env.traffic_matrix.sum()), bool(env.traffic_matrix.flags.writeable)))
+
+
+def test_env_outlives_attached_data_pack():
+    pack = make_pack()
+    name = f"test_{uuid.uuid4().hex[:8]}"
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    with DatasetBroker() as broker:
+        broker.publish(name, pack)
+        proc = ctx.Process(target=_worker, args=(name, queue))
+        proc.start()
+        proc.join(60)
+
+    assert proc.exitcode == 0
+    total, writeable = queue.get(timeout=5)
+    assert np.isclose(total, pack["traffic"].sum())
+    assert not writeable
@@ -0,0 +1,131 @@
+# utils/accumulators.py
+import numpy as np
+
+# KPI theo sector lấy từ info["sector"] của TelecomEnv.step (track_sectors=True)
+METRICS = ("power", "drop_rate", "switches", "served")
+
+
+class KPIAccumulator:
+    """
+    Thống kê streaming theo (metric, sector, giờ trong ngày) trong mảng cấp phát sẵn:
+    count / mean / M2 (Welford) và histogram bin cố định.
+    Bộ nhớ O(sectors × bins), không phụ thuộc độ dài run. Gộp được giữa các worker (merge).
+    """
+
+    def __init__(self, n_sectors, cfg, n_time_bins=24, n_hist_bins=20):
+        self.n_sectors = n_sectors
+        self.n_time_bins = n_time_bins
+        self.n_hist_bins = n_hist_bins
+        self.interval_minutes = cfg.traffic.get("interval_minutes", 15)
+
+        # Biên histogram từng metric (giá trị ngoài biên dồn vào bin đầu/cuối)
+        max_power = cfg.energy.p_base + cfg.energy.p_sector_active + cfg.energy.p_switch
+        self.hist_range = np.array([
+            [0.0, max_power],
+            [0.0, 1.0],
+            [0.0, 1.0],
+            [0.0, cfg.network.capacity_sector],
+        ])
+
+        shape = (len(METRICS), n_sectors, n_time_bins)
+        self.count = np.zeros(n_time_bins, dtype=np.int64)
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.hist = np.zeros((len(METRICS), n_sectors, n_hist_bins), dtype=np.int64)
+        self._rows = np.arange(len(METRICS))[:, None]
+        self._cols = np.arange(n_sectors)[None, :]
+
+    def time_bin(self, time_index):
+        minutes_of_day = (time_index * self.interval_minutes) % (24 * 60)
+        return int(minutes_of_day * self.n_time_bins // (24 * 60))
+
+    def update(self, info):
+        """Cập nhật từ info của 1 bước env (cần info['sector'] và info['time_index'])"""
+        x = np.stack([info["sector"][m] for m in METRICS])  # (metrics, sectors)
+        b = self.time_bin(info["time_index"])
+
+        # Welford
+        self.count[b] += 1
+        delta = x - self.mean[:, :, b]
+        self.mean[:, :, b] += delta / self.count[b]
+        self.m2[:, :, b] += delta * (x - self.mean[:, :, b])
+
+        lo, hi = self.hist_range[:, :1], self.hist_range[:, 1:]
+        idx = ((x - lo) / (hi - lo) * self.n_hist_bins).astype(int)
+        np.clip(idx, 0, self.n_hist_bins - 1, out=idx)
+        # Mỗi (metric, sector) chỉ có 1 chỉ số -> fancy index += không bị trùng
+        self.hist[self._rows, self._cols, idx] += 1
+
+    def merge(self, other):
+        """Gộp thống kê của worker khác (công thức song song của Chan)"""
+        n_a, n_b = self.count, other.count
+        n = n_a + n_b
+        safe_n = np.maximum(n, 1)
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (n_b / safe_n)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * (n_a * n_b / safe_n)
+        self.count = n
+        self.hist = self.hist + other.hist
+        return self
+
+    @staticmethod
+    def _reduce(count, mean, m2, axis):
+        """Gộp các ô (count, mean, M2) theo trục `axis` -> thống kê tổng hợp"""
+        total = count.sum(axis=axis)
+        safe = np.maximum(total, 1)
+        agg_mean = (count * mean).sum(axis=axis) / safe
+        agg_m2 = (m2 + count * (mean - np.expand_dims(agg_mean, axis)) ** 2).sum(axis=axis)
+        return total, agg_mean, agg_m2
+
+    def per_sector(self):
+        """(count (sectors,), mean (metrics, sectors), std (metrics, sectors)) trên mọi khung giờ"""
+        count = np.broadcast_to(self.count, self.mean.shape)
+        total, mean, m2 = self._reduce(count, self.mean, self.m2, axis=2)
+        return total[0], mean, np.sqrt(m2 / np.maximum(total, 1))
+
+    def per_time_bin(self):
+        """(count (bins,), mean (metrics, bins), std (metrics, bins)) của trung bình mỗi sector theo giờ"""
+        safe = np.maximum(self.count, 1)
+        return self.count, self.mean.mean(axis=1), np.sqrt((self.m2 / safe).mean(axis=1))
+
+    def to_frame(self):
+        """Bảng dạng dài (level, metric, sector, time_bin, count, mean, std) để export / phân tích"""
+        import pandas as pd
+
+        rows = []
+        sector_count, sector_mean, sector_std = self.per_sector()
+        for m, metric in enumerate(METRICS):
+            for s in range(self.n_sectors):
+                rows.append(("sector", metric, s, -1, int(sector_count[s]), sector_mean[m, s], sector_std[m, s]))
+                for b in range(self.n_time_bins):
+                    if self.count[b] == 0:
+                        continue
+                    std = np.sqrt(self.m2[m, s, b] / self.count[b])
+                    rows.append(("sector_time", metric, s, b, int(self.count[b]), self.mean[m, s, b], std))
+        return pd.DataFrame(rows, columns=["level", "metric", "sector", "time_bin", "count", "mean", "std"])
+
+    def histogram_frame(self):
+        import pandas as pd
+
+        m, s, b = np.indices(self.hist.shape).reshape(3, -1)
+        lo, hi = self.hist_range[m, 0], self.hist_range[m, 1]
+        width = (hi - lo) / self.n_hist_bins
+        return pd.DataFrame({
+            "metric": np.array(METRICS)[m], "sector": s, "bin": b,
+            "bin_low": lo + b * width, "bin_high": lo + (b + 1) * width,
+            "count": self.hist.reshape(-1),
+        })
+
+    def export(self, path):
+        """Ghi ra .csv hoặc .parquet (parquet cần pyarrow); histogram ghi vào file '<tên>_hist' cùng định dạng"""
+        import os
+
+        root, ext = os.path.splitext(path)
+        stats, hist = self.to_frame(), self.histogram_frame()
+        if ext == ".parquet":
+            stats.to_parquet(path, index=False)
+            hist.to_parquet(f"{root}_hist{ext}", index=False)
+        else:
+            stats.to_csv(path, index=False)
+            hist.to_csv(f"{root}_hist{ext or '.csv'}", index=False)
+        print(f"🧾 Đã export KPI chẩn đoán: {path}")
@@ -6,28 +6,28 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 sys.path.append(project_root)
 
-import hydra
 import pickle
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from omegaconf import DictConfig
 from utils.topology import NetworkGraph
+from utils.scenarios import steps_per_day
 
-@hydra.main(version_base=None, config_path="../conf", config_name="config")
 def create_dataset(cfg: DictConfig):
-    print(f"--- BẮT ĐẦU SINH DỮ LIỆU KPI VIỄN THÔNG (24h - 15p/bước) ---")
+    interval_minutes = cfg.traffic.get("interval_minutes", 15)
+    print(f"--- BẮT ĐẦU SINH DỮ LIỆU KPI VIỄN THÔNG (24h - {interval_minutes}p/bước) ---")
     
     # 1. Cấu hình
-    steps = 96  # 24h * 4
-    interval_minutes = 15
+    # pattern "spatial": sinh nhiều ngày (traffic.days) có tương quan không gian (utils/scenarios.py)
+    spatial = cfg.traffic.get("pattern", "sinewave") == "spatial"
+    steps = steps_per_day(interval_minutes) * (cfg.traffic.get("days", 1) if spatial else 1)
     start_time_str = "00:00"
     
     # Capacity Sector (để tính PRB Used %)
     # Giả sử capacity_sector trong config là Mbps
-    # Đổi sang MB trong 15 phút để ước lượng PRB: 
-    # Max MB = (Capacity_Mbps * 900s) / 8
-    max_mb_per_15m = (cfg.network.capacity_sector * 60 * 15) / 8
+    # Đổi sang MB trong 1 interval để ước lượng PRB: 
+    # Max MB = (Capacity_Mbps * interval_minutes * 60s) / 8
+    max_mb_per_interval = (cfg.network.capacity_sector * 60 * interval_minutes) / 8
     
     n_cells = cfg.network.num_cells
     sectors_per_cell = cfg.network.sectors_per_cell
@@ -35,79 +35,35 @@ def create_dataset(cfg: DictConfig):
     
     topology = NetworkGraph(n_cells, cfg.network.inter_site_distance)
     
-    # 2. Sinh mẫu hình sin (Time-series Pattern)
-    time_steps_rad = np.linspace(0, 2 * np.pi, steps)
-    base_pattern = np.sin(time_steps_rad - np.pi/2) + 1.2 # Đẩy đáy lên > 0.2
-    
-    # Các list để lưu trữ cho file .pkl (Ma trận)
-    traffic_matrix = [] # ps_traffic_mb
-    user_matrix = []    # avg_rrc_connected_user
-    prb_matrix = []     # prb_dl_used
-    
-    # List lưu CSV rows
-    csv_rows = []
-    
-    current_time = datetime.strptime(start_time_str, "%H:%M")
-    
     print(f"--> Đang tính toán KPIs cho {total_sectors} sectors...")
-    
-    for t in range(steps):
-        timestamp_str = current_time.strftime("%Y-%m-%d %H:%M:%S")
+
+    if spatial:
+        from utils.scenarios import generate_spatial_traffic
+        user_matrix, traffic_matrix = generate_spatial_traffic(topology, cfg, steps)
+    else:
+        # 2. Sinh mẫu hình sin (Time-series Pattern)
+        time_steps_rad = np.linspace(0, 2 * np.pi, steps)
+        base_pattern = np.sin(time_steps_rad - np.pi/2) + 1.2 # Đẩy đáy lên > 0.2
         
-        # Tạo nhiễu ngẫu nhiên
-        noise = np.random.uniform(0.8, 1.2, total_sectors)
+        # Tạo nhiễu ngẫu nhiên (độc lập từng sector)
+        noise = np.random.uniform(0.8, 1.2, (steps, total_sectors))
         
         # --- 1. Tính User (avg_rrc_connected_user) ---
-        current_users = (base_pattern[t] * (cfg.traffic.max_users * 0.8) * noise).astype(int)
-        current_users = np.clip(current_users, cfg.traffic.min_users, None)
+        user_matrix = (base_pattern[:, None] * (cfg.traffic.max_users * 0.8) * noise).astype(int)
+        user_matrix = np.clip(user_matrix, cfg.traffic.min_users, None)
         
         # --- 2. Tính Traffic (ps_traffic_mb) ---
         # Giả sử mỗi user dùng ngẫu nhiên data (MB/15p)
         # Data demand logic: Giờ cao điểm user dùng nhiều data hơn
-        demand_factor = base_pattern[t] # Cao điểm demand cao hơn
-        data_per_user = np.random.uniform(2.0, 10.0, total_sectors) * demand_factor
-        
-        current_traffic_mb = current_users * data_per_user
-        
-        # --- 3. Tính PRB Used (prb_dl_used) ---
-        # Công thức: (Traffic thực tế / Max Capacity) * 100
-        # Thêm chút ngẫu nhiên vì PRB phụ thuộc vào nhiễu sóng, khoảng cách user...
-        prb_util = (current_traffic_mb / max_mb_per_15m) * 100
-        prb_util = prb_util * np.random.uniform(0.9, 1.1, total_sectors)
-        prb_util = np.clip(prb_util, 0, 100) # Max 100%
-        
-        # Lưu vào Matrix (để train AI)
-        user_matrix.append(current_users)
-        traffic_matrix.append(current_traffic_mb)
-        prb_matrix.append(prb_util)
-        
-        # Lưu vào CSV Row
-        for c in range(n_cells):
-            # Giả lập tên trạm (eNodeB ID)
-            enodeb_id = 10000 + c 
-            
-            for s in range(sectors_per_cell):
-                global_idx = c * sectors_per_cell + s
-                
-                # Tạo tên Cell Name (Ví dụ: 10000_1, 10000_2)
-                cell_name = f"{enodeb_id}_{s+1}"
-                
-                row = {
-                    "timestamp": timestamp_str,
-                    "enodeb": enodeb_id,
-                    "cell_name": cell_name,
-                    "ps_traffic_mb": round(current_traffic_mb[global_idx], 2),
-                    "avg_rrc_connected_user": int(current_users[global_idx]),
-                    "prb_dl_used": round(prb_util[global_idx], 2)
-                }
-                csv_rows.append(row)
-        
-        current_time += timedelta(minutes=interval_minutes)
-        
-    # Convert sang numpy array
-    traffic_matrix = np.array(traffic_matrix)
-    user_matrix = np.array(user_matrix)
-    prb_matrix = np.array(prb_matrix)
+        data_per_user = np.random.uniform(2.0, 10.0, (steps, total_sectors)) * base_pattern[:, None]
+        traffic_matrix = user_matrix * data_per_user
+    
+    # --- 3. Tính PRB Used (prb_dl_used) ---
+    # Công thức: (Traffic thực tế / Max Capacity) * 100
+    # Thêm chút ngẫu nhiên vì PRB phụ thuộc vào nhiễu sóng, khoảng cách user...
+    prb_matrix = (traffic_matrix / max_mb_per_interval) * 100
+    prb_matrix = prb_matrix * np.random.uniform(0.9, 1.1, prb_matrix.shape)
+    prb_matrix = np.clip(prb_matrix, 0, 100) # Max 100%
     
     # 3. Lưu file
     folder_name = f"data_Telecom_KPIs_{n_cells}Cells"
@@ -120,17 +76,30 @@ def create_dataset(cfg: DictConfig):
         "traffic": traffic_matrix, # ps_traffic_mb
         "users": user_matrix,      # avg_rrc
         "prb": prb_matrix,         # prb_used
+        "interval_minutes": interval_minutes,  # TelecomEnv đọc độ phân giải từ dataset
         "config": cfg
     }
     with open(os.path.join(save_path, "env_data.pkl"), "wb") as f:
         pickle.dump(data_pack, f)
         
-    # Save CSV
+    # Save CSV (pandas chỉ cần ở bước này)
+    # Dựng cả bảng bằng mảng phẳng (Steps * Sectors hàng), thứ tự hàng: theo thời gian rồi theo sector
+    import pandas as pd
+    from utils.kpi import KPI_COLUMNS, sector_names
     csv_path = os.path.join(save_path, "kpi_data.csv")
-    df = pd.DataFrame(csv_rows)
+    start_time = datetime.strptime(start_time_str, "%H:%M")
+    timestamps = pd.date_range(start_time, periods=steps, freq=timedelta(minutes=interval_minutes))
+    df = pd.DataFrame({
+        "timestamp": np.repeat(timestamps.strftime("%Y-%m-%d %H:%M:%S"), total_sectors),
+        # Giả lập tên trạm (eNodeB ID) và Cell Name (Ví dụ: 10000_1, 10000_2)
+        "enodeb": np.tile(np.repeat(10000 + np.arange(n_cells), sectors_per_cell), steps),
+        "cell_name": np.tile(sector_names(n_cells, sectors_per_cell), steps),
+        "ps_traffic_mb": np.round(traffic_matrix, 2).reshape(-1),
+        "avg_rrc_connected_user": user_matrix.astype(int).reshape(-1),
+        "prb_dl_used": np.round(prb_matrix, 2).reshape(-1),
+    })
     # Sắp xếp lại cột cho đúng thứ tự yêu cầu
-    cols = ["timestamp", "enodeb", "cell_name", "ps_traffic_mb", "avg_rrc_connected_user", "prb_dl_used"]
-    df = df[cols] 
+    df = df[KPI_COLUMNS]
     df.to_csv(csv_path, index=False)
     
     print(f"✅ Đã tạo dữ liệu KPI chuẩn Viễn thông!")
@@ -139,4 +108,6 @@ def create_dataset(cfg: DictConfig):
     print(df.head(3))
 
 if __name__ == "__main__":
-    create_dataset()
+    # Hydra chỉ cần khi chạy trực tiếp file này (cli.py dùng OmegaConf)
+    import hydra
+    hydra.main(version_base=None, config_path="../conf", config_name="config")(create_dataset)()
@@ -0,0 +1,44 @@
+# utils/kpi.py
+import numpy as np
+
+# Schema của kpi_data.csv (xem utils/create.py)
+KPI_COLUMNS = ["timestamp", "enodeb", "cell_name", "ps_traffic_mb", "avg_rrc_connected_user", "prb_dl_used"]
+
+
+def sector_names(n_cells, sectors_per_cell):
+    """Tên sector theo đúng thứ tự global_idx của dataset: eNodeB 10000+c, cell_name '{enodeb}_{s+1}'"""
+    return [f"{10000 + c}_{s + 1}" for c in range(n_cells) for s in range(sectors_per_cell)]
+
+
+def sector_index(n_cells, sectors_per_cell):
+    """Map cell_name -> global_idx (dùng để đặt KPI vào đúng cột của ma trận)"""
+    return {name: i for i, name in enumerate(sector_names(n_cells, sectors_per_cell))}
+
+
+def rows_to_arrays(rows, index, errors=None):
+    """
+    Chuyển 1 snapshot KPI (list dict theo schema kpi_data.csv) thành 3 vector (Sectors,):
+    users, traffic, prb. Sector không có trong snapshot giữ giá trị 0.
+    errors: list -> dòng lỗi (cell_name lạ, giá trị không phải số) được bỏ qua và ghi (row, lỗi) vào đây
+    thay vì raise (dùng cho controller chạy lâu dài).
+    """
+    n = len(index)
+    users = np.zeros(n)
+    traffic = np.zeros(n)
+    prb = np.zeros(n)
+    for row in rows:
+        try:
+            i = index.get(str(row["cell_name"]))
+            if i is None:
+                raise KeyError(f"cell_name không thuộc topology: {row['cell_name']}")
+            values = (float(row["avg_rrc_connected_user"]), float(row["ps_traffic_mb"]),
+                      float(row.get("prb_dl_used", 0.0)))
+            if not np.all(np.isfinite(values)):
+                raise ValueError(f"KPI không hữu hạn: {values}")
+        except (KeyError, ValueError, TypeError) as e:
+            if errors is None:
+                raise
+            errors.append((row, e))
+            continue
+        users[i], traffic[i], prb[i] = values
+    return users, traffic, prb
@@ -0,0 +1,39 @@
+# utils/naming.py
+"""Quy ước tên dataset / checkpoint / thư mục cache dùng chung cho main.py, cli.py và agents (chỉ cần omegaconf)."""
+import hashlib
+import json
+import os
+
+from omegaconf import DictConfig, OmegaConf
+
+
+def get_dataset_name(cfg: DictConfig):
+    # Ví dụ: python main.py dataset_name="data_C5_S24_U50"
+    if "dataset_name" not in cfg:
+        # Nếu không nhập, thử tự đoán tên mặc định dựa trên config hiện tại
+        return f"data_C{cfg.network.num_cells}_S{cfg.traffic.simulation_steps}_U{cfg.traffic.max_users}"
+    return cfg.dataset_name
+
+
+def dynamics_digest(cfg: DictConfig):
+    """Hash ngắn của cfg.energy + cfg.network: KPI power/drop phụ thuộc các tham số này"""
+    dynamics = OmegaConf.to_container(cfg.energy), OmegaConf.to_container(cfg.network)
+    return hashlib.sha1(json.dumps(dynamics, sort_keys=True).encode()).hexdigest()[:8]
+
+
+def model_filename(cfg: DictConfig, dataset_name=None):
+    """Tên checkpoint theo thuật toán: ppo_<dataset>.zip (stable_baselines3) hoặc bdqn_<dataset>.pt (torch)"""
+    dataset_name = dataset_name or get_dataset_name(cfg)
+    if cfg.rl.get("algorithm", "ppo") == "bdqn":
+        return f"bdqn_{dataset_name}.pt"
+    return f"ppo_{dataset_name}.zip"
+
+
+def surrogate_history_path(cfg: DictConfig, dataset_name=None, project_root="."):
+    """
+    File lịch sử surrogate riêng cho từng dataset + cấu hình energy/network:
+    surrogate.history_path = models/surrogate_history.json -> models/surrogate_history_<dataset>_<digest>.json
+    """
+    root, ext = os.path.splitext(cfg.surrogate.history_path)
+    dataset_name = dataset_name or get_dataset_name(cfg)
+    return os.path.join(project_root, f"{root}_{dataset_name}_{dynamics_digest(cfg)}{ext or '.json'}")
@@ -0,0 +1,25 @@
+# utils/plot.py
+import numpy as np
+
+def plot_history(history_power, history_drop, save_path):
+    """Vẽ Power / Drop Rate theo từng round và lưu ra file ảnh"""
+    # matplotlib chỉ import khi thực sự vẽ
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 5))
+    plt.subplot(1, 2, 1)
+    plt.plot(history_power, marker='o', color='b')
+    plt.title("Average Power Consumption")
+    plt.xlabel("Round")
+    plt.ylabel("Watts")
+    
+    plt.subplot(1, 2, 2)
+    plt.plot(np.array(history_drop)*100, marker='s', color='r')
+    plt.title("Average Drop Rate")
+    plt.xlabel("Round")
+    plt.ylabel("Drop Rate (%)")
+    
+    plt.savefig(save_path)
+    plt.close()
@@ -2,7 +2,18 @@
 import pickle
 import os
 
-def load_dataset(dataset_name):
+def load_dataset(dataset_name, shared=False):
+    # shared=True: ưu tiên attach vào bản shared memory do DatasetBroker publish (không copy)
+    if shared:
+        from utils.shared_data import attach_dataset
+        try:
+            data = attach_dataset(dataset_name)
+            print(f"🔗 Đã attach dataset (shared memory): {dataset_name}")
+            return data
+        except FileNotFoundError:
+            # Chưa có broker publish (python cli.py share) -> mỗi process giữ 1 bản riêng
+            print(f"⚠️ Dataset '{dataset_name}' chưa được publish vào shared memory, đọc từ file pickle")
+
     # Đường dẫn tương đối từ thư mục chạy
     base_path = "datasets"
     file_path = os.path.join(base_path, dataset_name, "env_data.pkl")
@@ -0,0 +1,39 @@
+# utils/resample.py
+"""
+Gộp dataset sang độ phân giải thô hơn (ví dụ 15 phút -> 1 giờ) cho giai đoạn pretrain:
+  - traffic: tổng trong khối (lượng data của cả interval mới)
+  - users, prb: trung bình trong khối (giá trị tức thời / mức sử dụng)
+Phần dư cuối trace không đủ 1 khối bị bỏ.
+"""
+import numpy as np
+
+# Cách gộp từng ma trận của data pack (xem utils/create.py)
+AGGREGATION = {"traffic": "sum", "users": "mean", "prb": "mean"}
+
+
+def resample_matrix(matrix, factor, how="mean"):
+    """(Steps, Sectors) -> (Steps // factor, Sectors), gộp mỗi `factor` bước liên tiếp theo `how`"""
+    matrix = np.asarray(matrix)
+    steps = (matrix.shape[0] // factor) * factor
+    if steps == 0:
+        raise ValueError(f"Dataset chỉ có {matrix.shape[0]} bước, không đủ 1 khối {factor} bước")
+    blocks = matrix[:steps].reshape(steps // factor, factor, *matrix.shape[1:])
+    if how == "sum":
+        return blocks.sum(axis=1)
+    if how == "mean":
+        return blocks.mean(axis=1)
+    raise ValueError(f"Kiểu gộp không hợp lệ: {how}")
+
+
+def resample_data_pack(data_pack, factor, interval_minutes=15):
+    """
+    Data pack mới ở độ phân giải `factor * interval_minutes` phút.
+    Ghi lại 'interval_minutes' trong pack để TelecomEnv quy đổi traffic về đơn vị mỗi interval gốc.
+    """
+    base = data_pack.get("interval_minutes", interval_minutes)
+    coarse = {key: value for key, value in data_pack.items() if key not in AGGREGATION}
+    for key, how in AGGREGATION.items():
+        if key in data_pack:
+            coarse[key] = resample_matrix(data_pack[key], factor, how)
+    coarse["interval_minutes"] = base * factor
+    return coarse
@@ -0,0 +1,193 @@
+# utils/scenarios.py
+"""
+Sinh users/traffic có tương quan không gian trên NetworkGraph.positions:
+nhiễu tương quan (grid-FFT hoặc sparse kernel láng giềng), hotspot di chuyển, sự kiện sân vận động
+và dòng người đi làm (commuter). Mọi bước đều vectorized trên (Steps, Sectors).
+"""
+import numpy as np
+
+
+
+def steps_per_day(interval_minutes=15):
+    """Số bước mỗi ngày ở độ phân giải interval_minutes phút/bước (15 phút -> 96)"""
+    return (24 * 60) // interval_minutes
+
+
+def sector_positions(graph, sectors_per_cell, offset=None):
+    """Tọa độ (x, y) từng sector: lệch khỏi tâm trạm theo hướng azimuth 0/120/240 độ"""
+    offset = graph.isd / 3 if offset is None else offset
+    azimuth = np.deg2rad(360 * np.arange(sectors_per_cell) / sectors_per_cell)
+    delta = offset * np.stack([np.cos(azimuth), np.sin(azimuth)], axis=1)
+    return (graph.positions[:, None, :] + delta[None, :, :]).reshape(-1, 2)
+
+
+def _bounds(pos, margin):
+    lo = pos.min(axis=0) - margin
+    hi = pos.max(axis=0) + margin
+    return lo, hi
+
+
+def _ar1(white, rho):
+    """Làm mượt theo thời gian: z_t = rho * z_{t-1} + sqrt(1 - rho^2) * e_t (giữ phương sai = 1)"""
+    from scipy.signal import lfilter
+
+    return lfilter([np.sqrt(1 - rho ** 2)], [1, -rho], white, axis=0)
+
+
+def correlated_noise_fft(pos, steps, corr_length, rng, grid_size=256, chunk=64):
+    """
+    Trường Gauss tương quan không gian: nhiễu trắng trên lưới đều -> lọc Gauss trong miền tần số
+    (rfft2) -> lấy mẫu tại vị trí sector. Trả về (Steps, Sectors), phương sai ~1.
+    Mạng quá rộng so với grid_size * corr_length / 2 -> dùng correlated_noise_kernel.
+    """
+    lo, hi = _bounds(pos, 2 * corr_length)
+    extent = float(np.max(hi - lo))
+    # Ô lưới ~ corr_length / 2 nhưng không vượt grid_size ô mỗi chiều
+    n = int(min(grid_size, max(8, np.ceil(2 * extent / corr_length))))
+    cell = extent / n
+    if cell > corr_length / 2:
+        # Lưới bị giới hạn grid_size -> ô lớn hơn corr_length / 2, nhiều sector rơi chung 1 ô
+        # (chuỗi nhiễu giống hệt nhau): chuyển sang sparse kernel thay vì trả trường sai cấu trúc
+        print(f"⚠️ Lưới FFT {n}x{n} quá thô (ô {cell:.2f} km > corr_length/2), dùng sparse kernel")
+        return correlated_noise_kernel(pos, steps, corr_length, rng)
+    ij = np.clip(((pos - lo) / cell).astype(int), 0, n - 1)
+
+    kx = np.fft.fftfreq(n, d=cell)
+    ky = np.fft.rfftfreq(n, d=cell)
+    gain = np.exp(-2 * (np.pi * corr_length) ** 2 * (kx[:, None] ** 2 + ky[None, :] ** 2))
+
+    out = np.empty((steps, len(pos)))
+    for start in range(0, steps, chunk):
+        stop = min(start + chunk, steps)
+        white = rng.standard_normal((stop - start, n, n))
+        field = np.fft.irfft2(np.fft.rfft2(white) * gain, s=(n, n))
+        field /= field.std(axis=(1, 2), keepdims=True) + 1e-12
+        out[start:stop] = field[:, ij[:, 0], ij[:, 1]]
+    return out
+
+
+def correlated_noise_kernel(pos, steps, corr_length, rng):
+    """
+    Trường tương quan bằng sparse kernel Gauss giữa các sector trong bán kính 3 * corr_length.
+    Phù hợp mạng thưa / trải rộng (lưới FFT sẽ quá lớn). Trả về (Steps, Sectors), phương sai ~1.
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.spatial import cKDTree
+
+    tree = cKDTree(pos)
+    dist = tree.sparse_distance_matrix(tree, 3 * corr_length, output_type="coo_matrix")
+    # sparse_distance_matrix bỏ các cặp khoảng cách 0 (kể cả đường chéo) -> thêm lại
+    n = len(pos)
+    rows = np.concatenate([dist.row, np.arange(n)])
+    cols = np.concatenate([dist.col, np.arange(n)])
+    d = np.concatenate([dist.data, np.zeros(n)])
+    kernel = coo_matrix((np.exp(-0.5 * (d / corr_length) ** 2), (rows, cols)), shape=(n, n)).tocsr()
+    # Chuẩn hóa để mỗi sector có phương sai 1
+    norm = np.sqrt(np.asarray(kernel.multiply(kernel).sum(axis=1)).ravel())
+    white = rng.standard_normal((n, steps))
+    return (kernel @ white / norm[:, None]).T
+
+
+def _reflect(x, lo, hi):
+    """Giữ quỹ đạo trong khung [lo, hi] bằng phản xạ (sóng tam giác)"""
+    width = hi - lo
+    y = np.mod(x - lo, 2 * width)
+    return lo + width - np.abs(y - width)
+
+
+def _bump(pos, centers, radius):
+    """exp(-|pos - c_t|^2 / 2r^2): centers (Steps, 2) -> (Steps, Sectors)"""
+    d2 = ((pos[None, :, :] - centers[:, None, :]) ** 2).sum(axis=-1)
+    return np.exp(-0.5 * d2 / radius ** 2)
+
+
+def moving_hotspots(pos, steps, rng, count, radius, speed, gain):
+    """Hotspot di chuyển thẳng đều (phản xạ ở biên), speed tính bằng km / bước"""
+    field = np.zeros((steps, len(pos)))
+    if count == 0:
+        return field
+    lo, hi = _bounds(pos, 0.0)
+    t = np.arange(steps)[:, None]
+    for _ in range(count):
+        start = pos[rng.integers(len(pos))]
+        angle = rng.uniform(0, 2 * np.pi)
+        velocity = speed * np.array([np.cos(angle), np.sin(angle)])
+        centers = _reflect(start + t * velocity, lo, np.maximum(hi, lo + 1e-9))
+        field += gain * _bump(pos, centers, radius)
+    return field
+
+
+def stadium_events(pos, steps, rng, count, radius, gain, duration_hours=3, interval_minutes=15):
+    """Sự kiện cố định vị trí vào buổi tối một ngày ngẫu nhiên, tăng/giảm dần (cửa sổ Hann)"""
+    field = np.zeros((steps, len(pos)))
+    per_day = steps_per_day(interval_minutes)
+    per_hour = per_day / 24
+    n_days = max(steps // per_day, 1)
+    duration = max(int(round(duration_hours * per_hour)), 1)
+    profile = np.hanning(duration + 2)[1:-1]
+    # Bắt đầu 18h-20h
+    first, last = int(18 * per_hour), int(20 * per_hour)
+    for _ in range(count):
+        center = pos[rng.integers(len(pos))]
+        t0 = rng.integers(n_days) * per_day + rng.integers(first, max(last, first + 1))
+        t1 = min(t0 + duration, steps)
+        if t0 >= steps:
+            continue
+        bump = _bump(pos, center[None, :], radius)[0]
+        field[t0:t1] += gain * profile[:t1 - t0, None] * bump[None, :]
+    return field
+
+
+def commuter_flow(pos, steps, rng, gain, interval_minutes=15):
+    """
+    Khu trung tâm (business) tăng traffic giờ hành chính ngày thường, khu dân cư giảm tương ứng.
+    Trả về hệ số nhân (Steps, Sectors).
+    """
+    center = pos.mean(axis=0) + rng.normal(0, 0.1, 2) * np.ptp(pos, axis=0)
+    scale = max(float(np.max(np.ptp(pos, axis=0))) / 4, 1e-9)
+    business = np.exp(-0.5 * ((pos - center) ** 2).sum(axis=1) / scale ** 2)
+
+    t = np.arange(steps)
+    per_day = steps_per_day(interval_minutes)
+    hour = (t % per_day) * interval_minutes / 60
+    weekday = (t // per_day) % 7 < 5
+    # Giờ hành chính ~8h-18h, mượt hai đầu
+    work = (1 / (1 + np.exp(-(hour - 8) * 2)) - 1 / (1 + np.exp(-(hour - 18) * 2))) * weekday
+    return 1 + gain * work[:, None] * (2 * business[None, :] - 1)
+
+
+def generate_spatial_traffic(graph, cfg, steps, rng=None):
+    """
+    Sinh (users, traffic) dạng (Steps, Sectors) có tương quan không gian cho topology `graph`.
+    Tham số lấy từ cfg.traffic.spatial (xem conf/config.yaml), độ phân giải từ cfg.traffic.interval_minutes.
+    """
+    rng = rng if rng is not None else np.random.default_rng(cfg.traffic.get("seed", None))
+    scfg = cfg.traffic.spatial
+    pos = sector_positions(graph, cfg.network.sectors_per_cell)
+    n = len(pos)
+    interval_minutes = cfg.traffic.get("interval_minutes", 15)
+    per_day = steps_per_day(interval_minutes)
+
+    # Chu kỳ ngày (giống pattern sin của utils/create.py, lặp lại mỗi ngày)
+    phase = 2 * np.pi * (np.arange(steps) % per_day) / per_day
+    base_pattern = (np.sin(phase - np.pi / 2) + 1.2)[:, None]
+
+    if scfg.method == "kernel":
+        noise = correlated_noise_kernel(pos, steps, scfg.corr_length, rng)
+    else:
+        noise = correlated_noise_fft(pos, steps, scfg.corr_length, rng, scfg.get("grid_size", 256))
+    noise = _ar1(noise, scfg.get("time_corr", 0.8))
+
+    intensity = 1 + moving_hotspots(pos, steps, rng, scfg.hotspots, scfg.hotspot_radius,
+                                    scfg.hotspot_speed, scfg.hotspot_gain)
+    intensity += stadium_events(pos, steps, rng, scfg.events, scfg.event_radius, scfg.event_gain,
+                                interval_minutes=interval_minutes)
+    intensity *= commuter_flow(pos, steps, rng, scfg.commuter_gain, interval_minutes)
+
+    users = base_pattern * (cfg.traffic.max_users * 0.8) * np.exp(scfg.noise_std * noise) * intensity
+    users = np.clip(users.astype(int), cfg.traffic.min_users, None)
+
+    # Data demand: giờ cao điểm user dùng nhiều data hơn (như utils/create.py)
+    data_per_user = rng.uniform(2.0, 10.0, (steps, n)) * base_pattern
+    traffic = users * data_per_user
+    return users, traffic
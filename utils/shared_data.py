@@ -0,0 +1,136 @@
+# utils/shared_data.py
+import json
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from utils.topology import NetworkGraph
+
+# Các ma trận trong data_pack được chia sẻ qua shared memory
+SHARED_KEYS = ("traffic", "users", "prb")
+# Header JSON (shape/dtype) nằm trong 1 segment riêng, kích thước cố định
+META_SIZE = 4096
+
+
+def _segment_name(dataset_name, key):
+    # Tên segment cố định theo dataset -> worker chỉ cần biết dataset_name để attach
+    return f"llmrl_{dataset_name}_{key}"
+
+
+def _attach_segment(name):
+    """Attach vào segment đã có mà không đăng ký với resource_tracker (tránh worker unlink segment khi thoát)."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class _SegmentArray:
+    """
+    Bọc 1 segment đã attach qua __array_interface__: np.asarray(...) trả về ndarray có .base là object này
+    -> SharedMemory còn sống (không bị unmap) chừng nào còn array / view nào trỏ vào, kể cả khi data_pack bị bỏ.
+    """
+
+    def __init__(self, shm, shape, dtype):
+        self.shm = shm
+        address = np.frombuffer(shm.buf, dtype=np.uint8).ctypes.data
+        self.__array_interface__ = {
+            "shape": tuple(shape),
+            "typestr": np.dtype(dtype).str,
+            "data": (address, True),  # chỉ-đọc
+            "version": 3,
+        }
+
+
+class DatasetBroker:
+    """
+    Load dataset 1 lần vào multiprocessing.shared_memory, các worker (SubprocVecEnv,
+    Hydra multirun, ...) attach theo tên và nhận NumPy view chỉ-đọc -> 1 bản RAM / dataset.
+
+    Dùng trong process cha:
+        with DatasetBroker() as broker:
+            broker.publish("data_C5_S24_U50")
+            ...  # spawn worker, worker gọi load_dataset(name, shared=True)
+    """
+
+    def __init__(self):
+        self.segments = {}
+
+    def publish(self, dataset_name, data_pack=None):
+        if dataset_name in self.segments:
+            return dataset_name
+        if data_pack is None:
+            from utils.read import load_dataset
+            data_pack = load_dataset(dataset_name)
+
+        graph = data_pack["topology"]
+        arrays = {key: data_pack[key] for key in SHARED_KEYS if key in data_pack}
+        arrays["positions"] = graph.positions
+        arrays["dist_matrix"] = graph.dist_matrix
+
+        meta = {"isd": graph.isd, "arrays": {}}
+        segments = []
+        for key, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            shm = shared_memory.SharedMemory(name=_segment_name(dataset_name, key), create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+            meta["arrays"][key] = {"shape": list(arr.shape), "dtype": arr.dtype.str}
+            segments.append(shm)
+
+        header = json.dumps(meta).encode()
+        if len(header) > META_SIZE:
+            raise ValueError(f"Header dataset quá lớn ({len(header)} bytes)")
+        meta_shm = shared_memory.SharedMemory(name=_segment_name(dataset_name, "meta"), create=True, size=META_SIZE)
+        meta_shm.buf[:len(header)] = header
+        segments.append(meta_shm)
+
+        self.segments[dataset_name] = segments
+        total_mb = sum(s.size for s in segments) / 1e6
+        print(f"🔗 Đã chia sẻ dataset '{dataset_name}' qua shared memory ({total_mb:.1f} MB)")
+        return dataset_name
+
+    def close(self):
+        # Chỉ process sở hữu (broker) mới unlink; view đang mở ở worker vẫn hợp lệ trên Linux
+        for segments in self.segments.values():
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+        self.segments = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_dataset(dataset_name):
+    """
+    Worker: attach vào dataset đã được DatasetBroker publish.
+    Trả về data_pack cùng định dạng với load_dataset (traffic/users/prb/topology), các ma trận là view chỉ-đọc.
+    Raise FileNotFoundError nếu dataset chưa được publish.
+    """
+    meta_shm = _attach_segment(_segment_name(dataset_name, "meta"))
+    raw = bytes(meta_shm.buf).rstrip(b"\x00")
+    meta_shm.close()
+    meta = json.loads(raw)
+
+    data_pack = {}
+    # Đánh dấu dataset shared (TelecomEnv dựa vào đây để không tạo thêm ma trận feature riêng)
+    data_pack["_shm"] = []
+    for key, spec in meta["arrays"].items():
+        shm = _attach_segment(_segment_name(dataset_name, key))
+        # Array tự giữ segment (qua .base) -> env vẫn dùng được sau khi caller bỏ data_pack
+        data_pack[key] = np.asarray(_SegmentArray(shm, spec["shape"], spec["dtype"]))
+        data_pack["_shm"].append(shm)
+
+    data_pack["topology"] = NetworkGraph.from_arrays(
+        data_pack.pop("positions"), data_pack.pop("dist_matrix"), meta["isd"]
+    )
+    return data_pack
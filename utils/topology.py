@@ -1,5 +1,4 @@
 import numpy as np
-from scipy.spatial import distance_matrix
 
 class NetworkGraph:
     def __init__(self, num_cells, isd=1.5):
@@ -14,12 +13,24 @@ class NetworkGraph:
         
         # 2. Tính ma trận khoảng cách (Distance Matrix)
         # Kết quả là ma trận NxN: dist_matrix[i][j] là khoảng cách giữa cell i và j
+        # (import scipy tại chỗ: load dataset / attach shared memory không cần tới)
+        from scipy.spatial import distance_matrix
         self.dist_matrix = distance_matrix(self.positions, self.positions)
         
         # In ra để kiểm tra
         print(f"--- Network Topology Initialized ({num_cells} Cells) ---")
         # print(self.positions)
 
+    @classmethod
+    def from_arrays(cls, positions, dist_matrix, isd=1.5):
+        """Dựng graph từ mảng có sẵn (ví dụ view shared memory) mà không tính lại dist_matrix"""
+        graph = cls.__new__(cls)
+        graph.num_cells = len(positions)
+        graph.isd = isd
+        graph.positions = positions
+        graph.dist_matrix = dist_matrix
+        return graph
+
     def _generate_hexagonal_grid(self, n_points, isd):
         """Sinh tọa độ (x, y) theo hình tổ ong"""
         coords = []